@@ -1,5 +1,9 @@
 """API module for Fyers trading operations"""
+from . import fast_json
 from .fyers_client import FyersClient
 from .market_data import MarketData
 
+# Encode Fyers REST payloads with orjson instead of the stdlib json module
+fast_json.install()
+
 __all__ = ['FyersClient', 'MarketData']
@@ -0,0 +1,173 @@
+"""
+Async HTTP client for the Fyers REST API
+Pooled aiohttp session used by the *_async methods of FyersClient and MarketData
+"""
+import asyncio
+import logging
+import threading
+import aiohttp
+import config
+from api import fast_json
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+
+def run_coroutine(coro):
+    """
+    Run a coroutine to completion on a new event loop
+    
+    Uses uvloop when config.USE_UVLOOP is set and uvloop is installed,
+    otherwise the default asyncio loop.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+    """
+    if config.USE_UVLOOP and uvloop is not None:
+        return uvloop.run(coro)
+    
+    if config.USE_UVLOOP:
+        logger.warning("USE_UVLOOP is set but uvloop is not installed, using asyncio")
+    
+    return asyncio.run(coro)
+
+
+class AsyncFyersHTTP:
+    """
+    Thin async wrapper over the Fyers v3 REST endpoints
+
+    A single keep-alive connection pool is shared by every call made from
+    the same event loop, so concurrent requests for N symbols complete in
+    roughly one round-trip instead of N. Each loop gets its own session, so
+    one instance can be used from several threads' run_coroutine() calls.
+    """
+
+    def __init__(self, auth_header):
+        """
+        Initialize async HTTP client
+
+        Args:
+            auth_header: Fyers authorization header ("client_id:access_token")
+        """
+        # Static headers are built once and attached to the session
+        self.headers = {
+            "Authorization": auth_header,
+            "Content-Type": "application/json",
+            "version": "3"
+        }
+
+        # Event loop -> pooled session bound to it
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    def _get_session(self):
+        """
+        Get the pooled session for the running event loop
+
+        Returns:
+            aiohttp.ClientSession: Session bound to the current loop
+        """
+        loop = asyncio.get_running_loop()
+
+        with self._sessions_lock:
+            session = self._sessions.get(loop)
+
+            if session is None or session.closed:
+                # Forget sessions whose loop has finished without close()
+                for old_loop in [l for l in self._sessions if l.is_closed()]:
+                    del self._sessions[old_loop]
+
+                connector = aiohttp.TCPConnector(limit=64, ttl_dns_cache=300, enable_cleanup_closed=True)
+                session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+                self._sessions[loop] = session
+
+        return session
+
+    async def _request(self, method, url, params=None, payload=None):
+        """
+        Make a request and decode the JSON response
+
+        Args:
+            method: HTTP method
+            url: Full endpoint URL
+            params: Query parameters (optional)
+            payload: JSON body, as an object or pre-encoded bytes (optional)
+
+        Returns:
+            dict: Response JSON, or an error dict
+        """
+        try:
+            if payload is None or isinstance(payload, bytes):
+                data = payload
+            else:
+                data = fast_json.dumps(payload)
+            session = self._get_session()
+
+            async with session.request(method, url, params=params, data=data) as response:
+                # Fyers returns a JSON body for error statuses too
+                return fast_json.loads(await response.read())
+
+        except Exception as e:
+            logger.error("Async request to %s failed: %s", url, e)
+            return {"s": "error", "message": str(e)}
+
+    async def get(self, endpoint, params=None, data_api=False):
+        """
+        GET a Fyers endpoint
+
+        Args:
+            endpoint: Endpoint path (e.g., "/positions")
+            params: Query parameters (optional)
+            data_api: Use the market data base URL instead of the trading API
+
+        Returns:
+            dict: Response JSON
+        """
+        base_url = config.FYERS_DATA_URL if data_api else config.FYERS_BASE_URL
+        return await self._request("GET", base_url + endpoint, params=params)
+
+    async def post(self, endpoint, payload):
+        """
+        POST a JSON payload to a Fyers trading endpoint
+
+        Args:
+            endpoint: Endpoint path (e.g., "/orders/sync")
+            payload: JSON-serializable body or pre-encoded JSON bytes
+
+        Returns:
+            dict: Response JSON
+        """
+        return await self._request("POST", config.FYERS_BASE_URL + endpoint, payload=payload)
+
+    async def delete(self, endpoint, payload):
+        """
+        DELETE with a JSON payload on a Fyers trading endpoint
+
+        Args:
+            endpoint: Endpoint path (e.g., "/orders/sync")
+            payload: JSON-serializable body or pre-encoded JSON bytes
+
+        Returns:
+            dict: Response JSON
+        """
+        return await self._request("DELETE", config.FYERS_BASE_URL + endpoint, payload=payload)
+
+    async def close(self):
+        """
+        Close the pooled session of the running event loop
+
+        Sessions of other loops (other threads' run_coroutine() calls) are
+        left alone.
+        """
+        with self._sessions_lock:
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+
+        if session is not None and not session.closed:
+            await session.close()
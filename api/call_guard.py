@@ -0,0 +1,54 @@
+"""
+Call guard
+Shared error handling for FyersClient and MarketData API methods
+"""
+import functools
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Marker for "return the error dict" (None is a valid fallback value)
+ERROR_RESPONSE = object()
+
+
+def fyers_call(action, default=ERROR_RESPONSE):
+    """
+    Decorate an API method so that exceptions are logged and turned into a fallback
+
+    Args:
+        action: What the method does, for the log line (e.g., "fetching orders")
+        default: Value returned on exception; by default the
+                 {"s": "error", "message": ...} response dict
+
+    Returns:
+        Decorator for sync or async methods
+    """
+    def fallback(e):
+        if default is ERROR_RESPONSE:
+            return {"s": "error", "message": str(e)}
+        return default
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception as e:
+                    logger.error("Error %s: %s", action, e)
+                    return fallback(e)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                logger.error("Error %s: %s", action, e)
+                return fallback(e)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,178 @@
+"""
+Depth Stream
+Local order books fed by the Fyers v3 market depth (TBT) WebSocket
+"""
+import logging
+from fyers_apiv3.FyersWebsocket import tbt_ws
+import config
+
+logger = logging.getLogger(__name__)
+
+# All symbols share one subscription channel
+DEPTH_CHANNEL = "1"
+
+# Levels per side carried by the socket
+MAX_DEPTH_LEVELS = 50
+
+
+class DepthStream:
+    """
+    Per-symbol order books kept current by the Fyers depth socket
+
+    Each symbol's book is allocated once, in the same shape as the REST
+    depth response, and socket updates overwrite its levels in place.
+    Note that fyers_apiv3's FyersTbtSocket is a process-wide singleton,
+    so only one stream should be running.
+    """
+
+    def __init__(self, access_token, levels=None):
+        """
+        Initialize depth stream
+
+        Args:
+            access_token: Fyers socket token ("client_id:access_token")
+            levels: Price levels kept per side (default: config.DEPTH_STREAM_LEVELS)
+        """
+        self.access_token = access_token
+        self.levels = min(levels or config.DEPTH_STREAM_LEVELS, MAX_DEPTH_LEVELS)
+        self.socket = None
+        self.is_running = False
+
+        # symbol -> REST-shaped depth response, updated in place
+        self._depth = {}
+
+    @property
+    def is_live(self):
+        """True while the stream is running and its socket is connected"""
+        return self.is_running and self.socket.is_connected()
+
+    def start(self, symbols):
+        """
+        Connect the depth socket and subscribe to the given symbols
+
+        Args:
+            symbols: List of symbols to stream depth for
+        """
+        if self.is_running:
+            logger.warning("Depth stream already running")
+            return
+
+        self.socket = tbt_ws.FyersTbtSocket(
+            access_token=self.access_token,
+            write_to_file=False,
+            log_path="",
+            on_depth_update=self._on_depth_update,
+            on_error_message=self._on_error,
+            on_error=self._on_error,
+            on_close=self._on_close,
+            reconnect=True
+        )
+        self.socket.connect()
+        self.is_running = True
+
+        logger.info("Depth stream started")
+
+        self.subscribe(symbols)
+        self.socket.switchChannel(resume_channels={DEPTH_CHANNEL}, pause_channels=set())
+
+    def stop(self):
+        """
+        Close the depth socket
+        """
+        if self.socket is not None:
+            self.socket.close_connection()
+
+        self.is_running = False
+        self._depth.clear()
+        logger.info("Depth stream stopped")
+
+    def subscribe(self, symbols):
+        """
+        Subscribe to more symbols
+
+        Args:
+            symbols: List of symbols
+        """
+        new_symbols = [symbol for symbol in symbols if symbol not in self._depth]
+        if not new_symbols:
+            return
+
+        for symbol in new_symbols:
+            self._depth[symbol] = self._empty_depth(symbol)
+
+        self.socket.subscribe(
+            symbol_tickers=set(new_symbols),
+            channelNo=DEPTH_CHANNEL,
+            mode=tbt_ws.SubscriptionModes.DEPTH
+        )
+
+    def get_depth(self, symbol):
+        """
+        Get the streamed order book for a symbol
+
+        Args:
+            symbol: Trading symbol
+
+        Returns:
+            dict: Depth in the REST response shape, or None if the symbol
+                  is not subscribed or has not received a snapshot yet
+        """
+        depth = self._depth.get(symbol)
+
+        if depth is None or not depth['d'][symbol]['timestamp']:
+            return None
+
+        return depth
+
+    def _empty_depth(self, symbol):
+        """
+        Allocate a zeroed book for a symbol
+
+        Args:
+            symbol: Trading symbol
+
+        Returns:
+            dict: {'s': 'ok', 'd': {symbol: book}}
+        """
+        book = {
+            'totalbuyqty': 0,
+            'totalsellqty': 0,
+            'bids': [{'price': 0.0, 'volume': 0, 'ord': 0} for _ in range(self.levels)],
+            'ask': [{'price': 0.0, 'volume': 0, 'ord': 0} for _ in range(self.levels)],
+            'timestamp': 0
+        }
+        return {'s': 'ok', 'd': {symbol: book}}
+
+    def _on_depth_update(self, ticker, message):
+        """
+        Socket callback - copy the SDK's depth snapshot into the local book
+        """
+        depth = self._depth.get(ticker)
+        if depth is None:
+            return
+
+        book = depth['d'][ticker]
+        book['totalbuyqty'] = message.tbq
+        book['totalsellqty'] = message.tsq
+
+        for i, level in enumerate(book['bids']):
+            level['price'] = message.bidprice[i]
+            level['volume'] = message.bidqty[i]
+            level['ord'] = message.bidordn[i]
+
+        for i, level in enumerate(book['ask']):
+            level['price'] = message.askprice[i]
+            level['volume'] = message.askqty[i]
+            level['ord'] = message.askordn[i]
+
+        book['timestamp'] = message.timestamp
+
+    def _on_error(self, message):
+        logger.error("Depth stream error: %s", message)
+
+    def _on_close(self, message):
+        # Books stop updating while the socket is down; mark them empty so
+        # get_depth() falls back to REST until the next snapshot arrives
+        for symbol, depth in self._depth.items():
+            depth['d'][symbol]['timestamp'] = 0
+        logger.info("Depth stream closed: %s", message)
@@ -0,0 +1,62 @@
+"""
+Disconnected client stand-ins
+Null objects used in place of the Fyers model / HTTP client before login
+"""
+import logging
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# Read-only template; callers get a fresh copy they are free to mutate
+NOT_CONNECTED = MappingProxyType({"s": "error", "message": "Client not initialized"})
+
+
+def _not_connected(*args, **kwargs):
+    logger.error("Fyers client not initialized")
+    return dict(NOT_CONNECTED)
+
+
+async def _not_connected_async(*args, **kwargs):
+    return _not_connected()
+
+
+class DisconnectedFyers:
+    """
+    Stand-in for fyersModel.FyersModel while no session exists
+
+    Every API method returns the "Client not initialized" error dict, so
+    FyersClient and MarketData can call self.fyers unconditionally instead
+    of checking for None on every call. Falsy, like the None it replaces.
+    """
+
+    header = None
+
+    def __bool__(self):
+        return False
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _not_connected
+
+
+class DisconnectedHTTP:
+    """
+    Stand-in for AsyncFyersHTTP while no session exists
+    """
+
+    headers = {}
+
+    def __bool__(self):
+        return False
+
+    get = staticmethod(_not_connected_async)
+    post = staticmethod(_not_connected_async)
+    delete = staticmethod(_not_connected_async)
+
+    async def close(self):
+        pass
+
+
+DISCONNECTED_FYERS = DisconnectedFyers()
+DISCONNECTED_HTTP = DisconnectedHTTP()
@@ -0,0 +1,61 @@
+"""
+Fast JSON helpers
+orjson-backed encoding/decoding for the Fyers REST hot path
+"""
+import orjson
+from fyers_apiv3 import fyersModel
+
+# NumPy scalars (e.g. float32 prices from MarketData) and non-str keys
+# serialize the same way they would with the stdlib encoder
+_DUMPS_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj, default=None):
+    """
+    Serialize an object to compact JSON bytes
+
+    Args:
+        obj: JSON-serializable object
+        default: Optional callable for types orjson can't serialize
+
+    Returns:
+        bytes: JSON document
+    """
+    return orjson.dumps(obj, default=default, option=_DUMPS_OPTIONS)
+
+
+def loads(data):
+    """
+    Parse a JSON document
+
+    Args:
+        data: JSON as bytes or str
+
+    Returns:
+        Parsed object
+    """
+    return orjson.loads(data)
+
+
+class _FyersJSON:
+    """
+    Drop-in for the stdlib json module used inside fyersModel
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return dumps(obj).decode()
+
+    @staticmethod
+    def loads(data, **kwargs):
+        return loads(data)
+
+
+def install():
+    """
+    Make fyersModel encode request bodies with orjson
+
+    fyersModel decodes responses with requests' response.json(); that is
+    routed through orjson by the shared session in api.http_session.
+    """
+    fyersModel.json = _FyersJSON
@@ -3,17 +3,47 @@ Fyers API Client
 Wrapper for Fyers trading operations
 """
 import logging
+import sys
+from dataclasses import dataclass
 from fyers_apiv3 import fyersModel
 import config
+from api.order_encoder import encode_order, format_price
+from api.order_batcher import OrderBatcher
+from api.order_stream import OrderStream
+from api.call_guard import fyers_call
+from api.async_http import AsyncFyersHTTP
+from api.disconnected import DISCONNECTED_FYERS, DISCONNECTED_HTTP, NOT_CONNECTED
+from api.http_session import get_session, install_session
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class OrderDraft:
+    """
+    Pre-serialized order request
+    
+    Only the limit price (bytes price_start:price_end of body) is
+    spliced in when the draft is sent.
+    """
+    url: str
+    headers: dict
+    body: bytes
+    price_start: int
+    price_end: int
+
+
 class FyersClient:
     """
     Fyers API Client for trading operations
     """
     
+    # Order constants bound once at import instead of looked up on config per order
+    _ORDER_TYPE_MARKET = config.ORDER_TYPE_MARKET
+    _ORDER_TYPE_LIMIT = config.ORDER_TYPE_LIMIT
+    _ORDER_TYPES = {'MARKET': _ORDER_TYPE_MARKET, 'LIMIT': _ORDER_TYPE_LIMIT}
+    _VALIDITY = config.VALIDITY_DAY
+    
     def __init__(self, fyers_model=None):
         """
         Initialize Fyers Client
@@ -21,7 +51,19 @@ class FyersClient:
         Args:
             fyers_model: Initialized fyersModel.FyersModel instance
         """
-        self.fyers = fyers_model
+        self.fyers = fyers_model or DISCONNECTED_FYERS
+        self.http = AsyncFyersHTTP(fyers_model.header) if fyers_model else DISCONNECTED_HTTP
+        install_session(fyers_model)
+        
+        # Shared keep-alive session, also used to send order drafts
+        self.session = get_session()
+        
+        # Coalesces place_order/cancel_order calls when enabled
+        self.batcher = OrderBatcher(self)
+        
+        # Pushed orders/positions, started with start_order_stream()
+        self.order_stream = None
+        
         logger.info("FyersClient initialized")
     
     def set_fyers_model(self, fyers_model):
@@ -31,7 +73,122 @@ class FyersClient:
         Args:
             fyers_model: Initialized fyersModel.FyersModel instance
         """
-        self.fyers = fyers_model
+        self.fyers = fyers_model or DISCONNECTED_FYERS
+        self.http = AsyncFyersHTTP(fyers_model.header) if fyers_model else DISCONNECTED_HTTP
+        install_session(fyers_model)
+    
+    def enable_batching(self, interval=0.1, max_batch_size=None):
+        """
+        Route place_order/cancel_order through the order batcher
+        
+        Args:
+            interval: Seconds to collect orders before flushing a batch
+            max_batch_size: Maximum orders per batch (default: config.MAX_BASKET_ORDERS)
+        """
+        self.batcher.interval = interval
+        self.batcher.max_batch_size = max_batch_size or config.MAX_BASKET_ORDERS
+        self.batcher.start()
+    
+    def disable_batching(self):
+        """
+        Flush any queued orders and send subsequent orders directly
+        """
+        self.batcher.stop()
+    
+    @fyers_call("starting order stream", default=False)
+    def start_order_stream(self):
+        """
+        Start receiving order and position updates over the Fyers order socket
+        
+        Once the stream is connected and seeded, get_orders() and
+        get_positions() are answered from memory instead of REST.
+        
+        Returns:
+            bool: True if the stream is running
+        """
+        if not self.fyers:
+            logger.error("Fyers client not initialized")
+            return False
+        
+        if self.order_stream is None:
+            self.order_stream = OrderStream(
+                self.fyers.header,
+                snapshot=lambda: (self.fyers.orderbook(), self.fyers.positions())
+            )
+        
+        self.order_stream.start()
+        return True
+    
+    def stop_order_stream(self):
+        """
+        Stop the order stream; get_orders()/get_positions() go back to REST
+        """
+        if self.order_stream is not None:
+            self.order_stream.stop()
+    
+    def get_order_stream_version(self):
+        """
+        Get the order stream's change counter
+        
+        Returns:
+            int: Counter bumped on every streamed change, or None when not streaming
+        """
+        if self.order_stream is not None and self.order_stream.is_live:
+            return self.order_stream.version
+        return None
+    
+    def _build_order(self, symbol, side, quantity, order_type='MARKET', price=0,
+                     stop_loss=0, take_profit=0, product_type='INTRADAY'):
+        """
+        Build the order payload expected by the Fyers order endpoints
+        
+        Args:
+            Same as place_order()
+            
+        Returns:
+            dict: Order payload
+        """
+        is_market = order_type == 'MARKET'
+        
+        return {
+            "symbol": sys.intern(str(symbol)),
+            "qty": quantity,
+            "type": self._ORDER_TYPES.get(order_type, self._ORDER_TYPE_LIMIT),
+            "side": side,
+            "productType": product_type,
+            "limitPrice": 0 if is_market else price,
+            "stopPrice": 0,
+            "validity": self._VALIDITY,
+            "disclosedQty": 0,
+            "offlineOrder": False,
+            "stopLoss": stop_loss,
+            "takeProfit": take_profit
+        }
+    
+    def _encode_order(self, symbol, side, quantity, order_type='MARKET', price=0,
+                      stop_loss=0, take_profit=0, product_type='INTRADAY'):
+        """
+        Encode the same payload as _build_order() straight to JSON bytes
+        
+        Args:
+            Same as place_order()
+            
+        Returns:
+            bytes: Order payload
+        """
+        is_market = order_type == 'MARKET'
+        
+        return encode_order(
+            symbol,
+            quantity,
+            self._ORDER_TYPES.get(order_type, self._ORDER_TYPE_LIMIT),
+            side,
+            product_type,
+            0 if is_market else price,
+            self._VALIDITY,
+            stop_loss,
+            take_profit
+        )
     
     def place_order(self, symbol, side, quantity, order_type='MARKET', price=0, 
                     stop_loss=0, take_profit=0, product_type='INTRADAY'):
@@ -51,39 +208,172 @@ class FyersClient:
         Returns:
             dict: Order response
         """
+        order = {
+            "symbol": symbol,
+            "side": side,
+            "quantity": quantity,
+            "order_type": order_type,
+            "price": price,
+            "stop_loss": stop_loss,
+            "take_profit": take_profit,
+            "product_type": product_type
+        }
+        
+        if self.batcher.enabled:
+            return self.batcher.submit(order).result()
+        
+        return self.place_orders_batch([order])[0]
+    
+    def create_order_draft(self, symbol, side, quantity, product_type='INTRADAY', order_type='LIMIT'):
+        """
+        Pre-build an order request for a latency-sensitive path
+        
+        The payload is serialized and the auth headers built once, so
+        send_draft() only splices in the price and sends the bytes.
+        
+        Args:
+            symbol: Trading symbol
+            side: 1 for BUY, -1 for SELL
+            quantity: Order quantity
+            product_type: Product type - INTRADAY, MARGIN, CNC
+            order_type: Order type - LIMIT or MARKET
+            
+        Returns:
+            OrderDraft: Draft to pass to send_draft(), or None if not initialized
+        """
         if not self.fyers:
             logger.error("Fyers client not initialized")
-            return {"s": "error", "message": "Client not initialized"}
+            return None
         
-        try:
-            data = {
-                "symbol": symbol,
-                "qty": quantity,
-                "type": config.ORDER_TYPE_MARKET if order_type == 'MARKET' else config.ORDER_TYPE_LIMIT,
-                "side": side,
-                "productType": product_type,
-                "limitPrice": price if order_type != 'MARKET' else 0,
-                "stopPrice": 0,
-                "validity": config.VALIDITY_DAY,
-                "disclosedQty": 0,
-                "offlineOrder": False,
-                "stopLoss": stop_loss,
-                "takeProfit": take_profit
-            }
+        body = self._encode_order(symbol, side, quantity, order_type, product_type=product_type)
+        
+        price_key = b'"limitPrice":'
+        price_start = body.index(price_key) + len(price_key)
+        price_end = body.index(b',', price_start)
+        
+        return OrderDraft(
+            url=config.FYERS_BASE_URL + "/orders/sync",
+            headers=dict(self.http.headers),
+            body=body,
+            price_start=price_start,
+            price_end=price_end
+        )
+    
+    @fyers_call("sending order draft")
+    def send_draft(self, draft, price=None):
+        """
+        Send a pre-built order draft
+        
+        Args:
+            draft: OrderDraft from create_order_draft()
+            price: Limit price (optional, keeps the draft price if omitted)
+            
+        Returns:
+            dict: Order response
+        """
+        if draft is None:
+            logger.error("Fyers client not initialized")
+            return dict(NOT_CONNECTED)
+        
+        body = draft.body
+        if price is not None:
+            body = body[:draft.price_start] + format_price(price) + body[draft.price_end:]
+        
+        response = self.session.post(draft.url, data=body, headers=draft.headers).json()
+        
+        if response.get('s') == 'ok':
+            logger.info("Order placed successfully")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Order placed successfully: %r", response)
+        else:
+            logger.error("Order placement failed: %s", response)
+        
+        return response
+    
+    def place_orders_batch(self, orders):
+        """
+        Place several orders, sending them as basket (multi-order) requests
+        
+        Orders are grouped into chunks of config.MAX_BASKET_ORDERS so that
+        N orders cost one round-trip per chunk instead of one per order.
+        
+        Args:
+            orders: List of dicts with the same keys as place_order() arguments
             
-            response = self.fyers.place_order(data)
+        Returns:
+            list: One response dict per order, in the same order as `orders`
+        """
+        try:
+            payloads = [self._build_order(**order) for order in orders]
+        except Exception as e:
+            logger.error("Error building orders: %s", e)
+            return [{"s": "error", "message": str(e)} for _ in orders]
+        
+        responses = []
+        for start in range(0, len(payloads), config.MAX_BASKET_ORDERS):
+            responses.extend(self._submit_orders(payloads[start:start + config.MAX_BASKET_ORDERS]))
+        
+        return responses
+    
+    def _submit_orders(self, payloads):
+        """
+        Send one chunk of order payloads to Fyers
+        
+        A single payload goes through the regular order endpoint, anything
+        larger through the basket endpoint.
+        
+        Args:
+            payloads: List of order payloads built by _build_order()
             
-            if response.get('s') == 'ok':
-                logger.info(f"Order placed successfully: {response}")
+        Returns:
+            list: One response dict per payload
+        """
+        try:
+            if len(payloads) == 1:
+                responses = [self.fyers.place_order(payloads[0])]
             else:
-                logger.error(f"Order placement failed: {response}")
+                response = self.fyers.place_basket_orders(payloads)
+                responses = self._split_basket_response(response, len(payloads))
+            
+            for response in responses:
+                if response.get('s') == 'ok':
+                    logger.info("Order placed successfully")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Order placed successfully: %r", response)
+                else:
+                    logger.error("Order placement failed: %s", response)
             
-            return response
+            return responses
             
         except Exception as e:
-            logger.error(f"Error placing order: {e}")
-            return {"s": "error", "message": str(e)}
+            logger.error("Error placing order: %s", e)
+            return [{"s": "error", "message": str(e)} for _ in payloads]
+    
+    def _split_basket_response(self, response, count):
+        """
+        Split a basket response into per-order responses
+        
+        Args:
+            response: Response from a Fyers basket endpoint
+            count: Number of orders in the request
+            
+        Returns:
+            list: `count` response dicts correlated by index
+        """
+        data = response.get('data') if isinstance(response, dict) else None
+        
+        if not isinstance(data, list):
+            # Whole basket rejected - report the same error for every order
+            return [dict(response) for _ in range(count)]
+        
+        responses = [item.get('body', item) for item in data[:count]]
+        
+        while len(responses) < count:
+            responses.append({"s": "error", "message": "No response for order"})
+        
+        return responses
     
+    @fyers_call("modifying order")
     def modify_order(self, order_id, quantity=None, price=None, order_type=None):
         """
         Modify an existing order
@@ -97,35 +387,29 @@ class FyersClient:
         Returns:
             dict: Modification response
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return {"s": "error", "message": "Client not initialized"}
+        data = {
+            "id": order_id
+        }
         
-        try:
-            data = {
-                "id": order_id
-            }
-            
-            if quantity:
-                data["qty"] = quantity
-            if price:
-                data["limitPrice"] = price
-            if order_type:
-                data["type"] = config.ORDER_TYPE_MARKET if order_type == 'MARKET' else config.ORDER_TYPE_LIMIT
-            
-            response = self.fyers.modify_order(data)
-            
-            if response.get('s') == 'ok':
-                logger.info(f"Order modified successfully: {response}")
-            else:
-                logger.error(f"Order modification failed: {response}")
-            
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error modifying order: {e}")
-            return {"s": "error", "message": str(e)}
+        if quantity:
+            data["qty"] = quantity
+        if price:
+            data["limitPrice"] = price
+        if order_type:
+            data["type"] = config.ORDER_TYPE_MARKET if order_type == 'MARKET' else config.ORDER_TYPE_LIMIT
+        
+        response = self.fyers.modify_order(data)
+        
+        if response.get('s') == 'ok':
+            logger.info("Order modified successfully")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Order modified successfully: %r", response)
+        else:
+            logger.error("Order modification failed: %s", response)
+        
+        return response
     
+    @fyers_call("cancelling order")
     def cancel_order(self, order_id):
         """
         Cancel an existing order
@@ -136,28 +420,63 @@ class FyersClient:
         Returns:
             dict: Cancellation response
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return {"s": "error", "message": "Client not initialized"}
+        if self.batcher.enabled:
+            return self.batcher.submit_cancel(order_id).result()
         
-        try:
-            data = {
-                "id": order_id
-            }
-            
-            response = self.fyers.cancel_order(data)
+        data = {
+            "id": order_id
+        }
+        
+        response = self.fyers.cancel_order(data)
+        
+        if response.get('s') == 'ok':
+            logger.info("Order cancelled successfully")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Order cancelled successfully: %r", response)
+        else:
+            logger.error("Order cancellation failed: %s", response)
+        
+        return response
+    
+    def cancel_orders_batch(self, order_ids):
+        """
+        Cancel several orders, sending them as basket (multi-order) requests
+        
+        Args:
+            order_ids: List of order IDs to cancel
             
-            if response.get('s') == 'ok':
-                logger.info(f"Order cancelled successfully: {response}")
-            else:
-                logger.error(f"Order cancellation failed: {response}")
+        Returns:
+            list: One response dict per order ID, in the same order as `order_ids`
+        """
+        responses = []
+        
+        for start in range(0, len(order_ids), config.MAX_BASKET_ORDERS):
+            chunk = [{"id": order_id} for order_id in order_ids[start:start + config.MAX_BASKET_ORDERS]]
             
-            return response
+            try:
+                if len(chunk) == 1:
+                    chunk_responses = [self.fyers.cancel_order(chunk[0])]
+                else:
+                    response = self.fyers.cancel_basket_orders(chunk)
+                    chunk_responses = self._split_basket_response(response, len(chunk))
+                
+                for response in chunk_responses:
+                    if response.get('s') == 'ok':
+                        logger.info("Order cancelled successfully")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Order cancelled successfully: %r", response)
+                    else:
+                        logger.error("Order cancellation failed: %s", response)
+                
+            except Exception as e:
+                logger.error("Error cancelling orders: %s", e)
+                chunk_responses = [{"s": "error", "message": str(e)} for _ in chunk]
             
-        except Exception as e:
-            logger.error(f"Error cancelling order: {e}")
-            return {"s": "error", "message": str(e)}
+            responses.extend(chunk_responses)
+        
+        return responses
     
+    @fyers_call("fetching orders")
     def get_orders(self):
         """
         Get all orders
@@ -165,19 +484,14 @@ class FyersClient:
         Returns:
             dict: Orders data
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return {"s": "error", "message": "Client not initialized"}
+        if self.order_stream is not None and self.order_stream.is_live:
+            return self.order_stream.get_orders()
         
-        try:
-            response = self.fyers.orderbook()
-            logger.info("Orders fetched successfully")
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error fetching orders: {e}")
-            return {"s": "error", "message": str(e)}
+        response = self.fyers.orderbook()
+        logger.info("Orders fetched successfully")
+        return response
     
+    @fyers_call("fetching positions")
     def get_positions(self):
         """
         Get all positions
@@ -185,19 +499,14 @@ class FyersClient:
         Returns:
             dict: Positions data
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return {"s": "error", "message": "Client not initialized"}
+        if self.order_stream is not None and self.order_stream.is_live:
+            return self.order_stream.get_positions()
         
-        try:
-            response = self.fyers.positions()
-            logger.info("Positions fetched successfully")
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error fetching positions: {e}")
-            return {"s": "error", "message": str(e)}
+        response = self.fyers.positions()
+        logger.info("Positions fetched successfully")
+        return response
     
+    @fyers_call("fetching holdings")
     def get_holdings(self):
         """
         Get all holdings
@@ -205,19 +514,11 @@ class FyersClient:
         Returns:
             dict: Holdings data
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return {"s": "error", "message": "Client not initialized"}
-        
-        try:
-            response = self.fyers.holdings()
-            logger.info("Holdings fetched successfully")
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error fetching holdings: {e}")
-            return {"s": "error", "message": str(e)}
+        response = self.fyers.holdings()
+        logger.info("Holdings fetched successfully")
+        return response
     
+    @fyers_call("fetching tradebook")
     def get_tradebook(self):
         """
         Get trade history
@@ -225,19 +526,11 @@ class FyersClient:
         Returns:
             dict: Tradebook data
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return {"s": "error", "message": "Client not initialized"}
-        
-        try:
-            response = self.fyers.tradebook()
-            logger.info("Tradebook fetched successfully")
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error fetching tradebook: {e}")
-            return {"s": "error", "message": str(e)}
+        response = self.fyers.tradebook()
+        logger.info("Tradebook fetched successfully")
+        return response
     
+    @fyers_call("exiting position")
     def exit_position(self, position_id):
         """
         Exit a specific position
@@ -248,28 +541,22 @@ class FyersClient:
         Returns:
             dict: Exit response
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return {"s": "error", "message": "Client not initialized"}
+        data = {
+            "id": position_id
+        }
         
-        try:
-            data = {
-                "id": position_id
-            }
-            
-            response = self.fyers.exit_positions(data)
-            
-            if response.get('s') == 'ok':
-                logger.info(f"Position exited successfully: {response}")
-            else:
-                logger.error(f"Position exit failed: {response}")
-            
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error exiting position: {e}")
-            return {"s": "error", "message": str(e)}
+        response = self.fyers.exit_positions(data)
+        
+        if response.get('s') == 'ok':
+            logger.info("Position exited successfully")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Position exited successfully: %r", response)
+        else:
+            logger.error("Position exit failed: %s", response)
+        
+        return response
     
+    @fyers_call("converting position")
     def convert_position(self, symbol, quantity, from_product, to_product, side):
         """
         Convert position from one product type to another
@@ -284,28 +571,85 @@ class FyersClient:
         Returns:
             dict: Conversion response
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return {"s": "error", "message": "Client not initialized"}
+        data = {
+            "symbol": symbol,
+            "positionSide": side,
+            "convertQty": quantity,
+            "convertFrom": from_product,
+            "convertTo": to_product
+        }
         
-        try:
-            data = {
-                "symbol": symbol,
-                "positionSide": side,
-                "convertQty": quantity,
-                "convertFrom": from_product,
-                "convertTo": to_product
-            }
-            
-            response = self.fyers.convert_position(data)
-            
-            if response.get('s') == 'ok':
-                logger.info(f"Position converted successfully: {response}")
-            else:
-                logger.error(f"Position conversion failed: {response}")
+        response = self.fyers.convert_position(data)
+        
+        if response.get('s') == 'ok':
+            logger.info("Position converted successfully")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Position converted successfully: %r", response)
+        else:
+            logger.error("Position conversion failed: %s", response)
+        
+        return response
+    
+    @fyers_call("placing order")
+    async def place_order_async(self, symbol, side, quantity, order_type='MARKET', price=0,
+                                stop_loss=0, take_profit=0, product_type='INTRADAY'):
+        """
+        Place an order without blocking the event loop
+        
+        Args:
+            Same as place_order()
             
-            return response
+        Returns:
+            dict: Order response
+        """
+        body = self._encode_order(symbol, side, quantity, order_type, price,
+                                  stop_loss, take_profit, product_type)
+        response = await self.http.post("/orders/sync", body)
+        
+        if response.get('s') == 'ok':
+            logger.info("Order placed successfully")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Order placed successfully: %r", response)
+        else:
+            logger.error("Order placement failed: %s", response)
+        
+        return response
+    
+    async def cancel_order_async(self, order_id):
+        """
+        Cancel an order without blocking the event loop
+        
+        Args:
+            order_id: Order ID to cancel
             
-        except Exception as e:
-            logger.error(f"Error converting position: {e}")
-            return {"s": "error", "message": str(e)}
+        Returns:
+            dict: Cancellation response
+        """
+        response = await self.http.delete("/orders/sync", {"id": order_id})
+        
+        if response.get('s') == 'ok':
+            logger.info("Order cancelled successfully")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Order cancelled successfully: %r", response)
+        else:
+            logger.error("Order cancellation failed: %s", response)
+        
+        return response
+    
+    async def get_orders_async(self):
+        """
+        Get all orders without blocking the event loop
+        
+        Returns:
+            dict: Orders data
+        """
+        return await self.http.get("/orders")
+    
+    async def get_positions_async(self):
+        """
+        Get all positions without blocking the event loop
+        
+        Returns:
+            dict: Positions data
+        """
+        return await self.http.get("/positions")
@@ -0,0 +1,75 @@
+"""
+Shared HTTP session for Fyers REST calls
+One pooled keep-alive requests.Session reused by every client
+"""
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from api import fast_json
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _decode_with_orjson(response, *args, **kwargs):
+    """
+    Response hook: make response.json() decode with orjson, once per response
+
+    fyersModel calls response.json() more than once per request (for its
+    debug log and for the return value), so the parsed body is kept.
+    """
+    parsed = []
+
+    def json(**kwargs):
+        if not parsed:
+            parsed.append(fast_json.loads(response.content))
+        return parsed[0]
+
+    response.json = json
+    return response
+
+
+def get_session():
+    """
+    Get the process-wide pooled session, creating it on first use
+
+    Transient gateway errors (502/503/504) on idempotent requests are
+    retried; order POSTs are never retried. Response bodies are decoded
+    with orjson.
+
+    Returns:
+        requests.Session: Shared session
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+            adapter = HTTPAdapter(max_retries=retry, pool_connections=32, pool_maxsize=64)
+
+            _session = requests.Session()
+            _session.headers.update({"Connection": "keep-alive"})
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session.hooks['response'].append(_decode_with_orjson)
+
+            logger.info("Shared HTTP session created")
+
+    return _session
+
+
+def install_session(fyers_model):
+    """
+    Route a FyersModel's synchronous calls through the shared session
+
+    Args:
+        fyers_model: fyersModel.FyersModel instance (sync mode)
+    """
+    service = getattr(fyers_model, 'service', None)
+
+    if isinstance(getattr(service, 'session', None), requests.Session):
+        service.session = get_session()
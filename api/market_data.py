@@ -2,14 +2,38 @@
 Market Data Module
 Fetches real-time and historical market data from Fyers API
 """
+import asyncio
 import logging
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import config
-from utils.helpers import get_date_range
+from api.call_guard import fyers_call
+from api.async_http import AsyncFyersHTTP, run_coroutine
+from api.disconnected import DISCONNECTED_FYERS, DISCONNECTED_HTTP
+from api.http_session import install_session
+from api.quote_batch import QuoteBatch
+from api.quote_stream import QuoteStream
+from api.depth_stream import DepthStream
+from utils.helpers import get_date_range_strings
 
 logger = logging.getLogger(__name__)
 
+# History cache: completed candles live for one candle interval (seconds);
+# the candle still forming is fetched fresh on every call
+HISTORY_CACHE_SIZE = 256
+HISTORY_CACHE_TTL = {
+    '1': 60,
+    '5': 300,
+    '15': 900,
+    '30': 1800,
+    '60': 3600,
+    'D': 3600
+}
+
 
 class MarketData:
     """
@@ -23,7 +47,20 @@ class MarketData:
         Args:
             fyers_model: Initialized fyersModel.FyersModel instance
         """
-        self.fyers = fyers_model
+        self.fyers = fyers_model or DISCONNECTED_FYERS
+        self.http = AsyncFyersHTTP(fyers_model.header) if fyers_model else DISCONNECTED_HTTP
+        install_session(fyers_model)
+        
+        # (symbol, timeframe, days, candle bucket) -> (stored_at, completed candles)
+        self._history_cache = OrderedDict()
+        self._history_lock = threading.Lock()
+        
+        # Streaming LTP cache, started with start_quote_stream()
+        self.quote_stream = None
+        
+        # Streaming order books, started with start_depth_stream()
+        self.depth_stream = None
+        
         logger.info("MarketData initialized")
     
     def set_fyers_model(self, fyers_model):
@@ -33,12 +70,219 @@ class MarketData:
         Args:
             fyers_model: Initialized fyersModel.FyersModel instance
         """
-        self.fyers = fyers_model
+        self.fyers = fyers_model or DISCONNECTED_FYERS
+        self.http = AsyncFyersHTTP(fyers_model.header) if fyers_model else DISCONNECTED_HTTP
+        install_session(fyers_model)
+        self.clear_history_cache()
+    
+    def clear_history_cache(self):
+        """
+        Drop all cached historical candles
+        """
+        with self._history_lock:
+            self._history_cache.clear()
+    
+    def _history_cache_key(self, symbol, days, timeframe):
+        """
+        Build the history cache key
+        
+        The current time is floored to the candle interval, so every call
+        within the same candle maps to the same key.
+        
+        Returns:
+            tuple: (key, ttl_seconds)
+        """
+        ttl = HISTORY_CACHE_TTL.get(timeframe, 60)
+        return (symbol, timeframe, days, int(time.time()) // ttl), ttl
+    
+    def _get_cached_candles(self, key, ttl):
+        """
+        Look up cached completed candles
+        
+        Returns:
+            ndarray: (N, 6) float64 candles, or None on a miss or expired entry
+        """
+        with self._history_lock:
+            entry = self._history_cache.get(key)
+            
+            if entry is None:
+                return None
+            
+            stored_at, candles = entry
+            if time.monotonic() - stored_at > ttl:
+                del self._history_cache[key]
+                return None
+            
+            self._history_cache.move_to_end(key)
+            return candles
+    
+    def _cache_candles(self, key, response):
+        """
+        Store the completed candles of a successful history response
+        
+        Candles are kept as one (N, 6) float64 array, parsed once, so cache
+        hits can be sliced without touching the raw lists again. The last
+        candle may still be forming, so it is left out of the cache.
+        
+        Returns:
+            ndarray: All candles of the response, or None if it failed
+        """
+        if response.get('s') != 'ok' or 'candles' not in response:
+            return None
+        
+        candles = np.asarray(response['candles'], dtype=np.float64).reshape(-1, 6)
+        
+        with self._history_lock:
+            self._history_cache[key] = (time.monotonic(), candles[:-1])
+            self._history_cache.move_to_end(key)
+            
+            while len(self._history_cache) > HISTORY_CACHE_SIZE:
+                self._history_cache.popitem(last=False)
+        
+        return candles
     
+    def _history_request(self, symbol, days, timeframe):
+        """
+        Build the history request parameters
+        
+        Args:
+            symbol: Trading symbol
+            days: Number of days of historical data
+            timeframe: Candle timeframe
+            
+        Returns:
+            dict: Request parameters
+        """
+        # date_format "1" expects YYYY-MM-DD strings, which are cached per day
+        from_date, to_date = get_date_range_strings(days)
+        
+        return {
+            "symbol": symbol,
+            "resolution": timeframe,
+            "date_format": "1",
+            "range_from": from_date,
+            "range_to": to_date,
+            "cont_flag": "1"
+        }
+    
+    def _tail_request(self, symbol, timeframe, completed):
+        """
+        Build the request for the candles after the cached completed ones
+        
+        Args:
+            symbol: Trading symbol
+            timeframe: Candle timeframe
+            completed: Cached completed candles (at least one)
+            
+        Returns:
+            dict: Request parameters
+        """
+        # date_format "0" takes epoch seconds, so only the current candle(s) come back
+        return {
+            "symbol": symbol,
+            "resolution": timeframe,
+            "date_format": "0",
+            "range_from": str(int(completed[-1, 0]) + 1),
+            "range_to": str(int(time.time())),
+            "cont_flag": "1"
+        }
+    
+    def _join_tail(self, completed, response):
+        """
+        Append the candles of a tail response to the cached completed candles
+        
+        Returns:
+            ndarray: (N, 6) float64 candles, or None if the response failed
+        """
+        if response.get('s') != 'ok' or 'candles' not in response:
+            return None
+        
+        tail = np.asarray(response['candles'], dtype=np.float64).reshape(-1, 6)
+        # Drop any overlap with the completed candles
+        tail = tail[tail[:, 0] > completed[-1, 0]]
+        
+        return np.concatenate((completed, tail))
+    
+    def _get_candles(self, symbol, days, timeframe):
+        """
+        Fetch candles, reusing cached completed candles when there are any
+        
+        On a cache hit only the candles after the last completed one are
+        requested, so the forming candle always follows the live price.
+        
+        Returns:
+            tuple: (candles or None if the request failed, raw response)
+        """
+        key, ttl = self._history_cache_key(symbol, days, timeframe)
+        completed = self._get_cached_candles(key, ttl)
+        
+        if completed is not None and len(completed):
+            response = self.fyers.history(self._tail_request(symbol, timeframe, completed))
+            return self._join_tail(completed, response), response
+        
+        response = self.fyers.history(self._history_request(symbol, days, timeframe))
+        return self._cache_candles(key, response), response
+    
+    async def _get_candles_async(self, symbol, days, timeframe):
+        """
+        _get_candles() without blocking the event loop
+        """
+        key, ttl = self._history_cache_key(symbol, days, timeframe)
+        completed = self._get_cached_candles(key, ttl)
+        
+        if completed is not None and len(completed):
+            response = await self.http.get("/history", self._tail_request(symbol, timeframe, completed), data_api=True)
+            return self._join_tail(completed, response), response
+        
+        response = await self.http.get("/history", self._history_request(symbol, days, timeframe), data_api=True)
+        return self._cache_candles(key, response), response
+    
+    def _history_to_frame(self, symbol, response):
+        """
+        Convert a history response into a DataFrame
+        
+        Args:
+            symbol: Trading symbol (for logging)
+            response: Response from the history endpoint
+            
+        Returns:
+            pandas DataFrame with historical data, or None if the request failed.
+            OHLC columns are float32 and volume is int64 to halve memory per
+            candle; code reading `.values` gets float32 arrays.
+        """
+        if response.get('s') == 'ok' and 'candles' in response:
+            # One typed 2-D array instead of pandas' row-wise list-of-lists path
+            arr = np.asarray(response['candles'], dtype=np.float64).reshape(-1, 6)
+            timestamps = arr[:, 0].astype(np.int64)
+            
+            df = pd.DataFrame(
+                {
+                    'timestamp': timestamps,
+                    'open': arr[:, 1].astype(np.float32),
+                    'high': arr[:, 2].astype(np.float32),
+                    'low': arr[:, 3].astype(np.float32),
+                    'close': arr[:, 4].astype(np.float32),
+                    'volume': arr[:, 5].astype(np.int64)
+                },
+                # Epoch seconds reinterpreted as datetime64[s] - no parsing
+                index=pd.DatetimeIndex(timestamps.view('datetime64[s]'), name='datetime')
+            )
+            
+            logger.info("Historical data fetched for %s: %d candles", symbol, len(df))
+            return df
+        else:
+            logger.error("Failed to fetch historical data: %s", response)
+            return None
+    
+    @fyers_call("fetching historical data", default=None)
     def get_historical_data(self, symbol, days=30, timeframe='5'):
         """
         Get historical candle data
         
+        Completed candles are cached for one candle interval, so repeated
+        calls for the same symbol/timeframe within a candle only fetch the
+        candle that is still forming.
+        
         Args:
             symbol: Trading symbol (e.g., "NSE:SBIN-EQ")
             days: Number of days of historical data
@@ -47,45 +291,76 @@ class MarketData:
         Returns:
             pandas DataFrame with historical data
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return None
+        candles, response = self._get_candles(symbol, days, timeframe)
+        
+        if candles is None:
+            return self._history_to_frame(symbol, response)
+        return self._history_to_frame(symbol, {'s': 'ok', 'candles': candles})
+    
+    @fyers_call("fetching historical data", default=None)
+    def get_close_series(self, symbol, days=30, timeframe='5'):
+        """
+        Get historical candle times and closes as plain arrays
         
-        try:
-            from_date, to_date = get_date_range(days)
+        Same data and cache as get_historical_data(), without building a
+        DataFrame - for per-tick strategy code that only needs closes.
+        
+        Args:
+            symbol: Trading symbol (e.g., "NSE:SBIN-EQ")
+            days: Number of days of historical data
+            timeframe: Candle timeframe ('1', '5', '15', '30', '60', 'D')
             
-            data = {
-                "symbol": symbol,
-                "resolution": timeframe,
-                "date_format": "1",
-                "range_from": str(from_date),
-                "range_to": str(to_date),
-                "cont_flag": "1"
-            }
+        Returns:
+            tuple: (int64 epoch-second timestamps, float64 closes), or None
+                   if the request failed
+        """
+        candles, response = self._get_candles(symbol, days, timeframe)
+        
+        if candles is None:
+            logger.error("Failed to fetch historical data: %s", response)
+            return None
+        
+        return candles[:, 0].astype(np.int64), np.ascontiguousarray(candles[:, 4])
+    
+    @fyers_call("fetching historical data", default=None)
+    async def get_historical_data_async(self, symbol, days=30, timeframe='5'):
+        """
+        Get historical candle data without blocking the event loop
+        
+        Args:
+            Same as get_historical_data()
             
-            response = self.fyers.history(data)
+        Returns:
+            pandas DataFrame with historical data
+        """
+        candles, response = await self._get_candles_async(symbol, days, timeframe)
+        
+        if candles is None:
+            return self._history_to_frame(symbol, response)
+        return self._history_to_frame(symbol, {'s': 'ok', 'candles': candles})
+    
+    def get_historical_data_many(self, symbols, days=30, timeframe='5'):
+        """
+        Get historical candle data for several symbols concurrently
+        
+        Args:
+            symbols: List of trading symbols
+            days: Number of days of historical data
+            timeframe: Candle timeframe
             
-            if response.get('s') == 'ok' and 'candles' in response:
-                # Convert to DataFrame
-                df = pd.DataFrame(
-                    response['candles'],
-                    columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
-                )
-                
-                # Convert timestamp to datetime
-                df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
-                df.set_index('datetime', inplace=True)
-                
-                logger.info(f"Historical data fetched for {symbol}: {len(df)} candles")
-                return df
-            else:
-                logger.error(f"Failed to fetch historical data: {response}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error fetching historical data: {e}")
-            return None
+        Returns:
+            dict: {symbol: DataFrame or None}
+        """
+        async def fetch_all():
+            frames = await asyncio.gather(*[
+                self.get_historical_data_async(symbol, days, timeframe) for symbol in symbols
+            ])
+            await self.http.close()
+            return frames
+        
+        return dict(zip(symbols, run_coroutine(fetch_all())))
     
+    @fyers_call("fetching quotes", default=None)
     def get_quotes(self, symbols):
         """
         Get real-time quotes for symbols
@@ -96,30 +371,102 @@ class MarketData:
         Returns:
             dict: Quote data
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return None
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        
+        data = {
+            "symbols": ",".join(symbols)
+        }
         
-        try:
-            if isinstance(symbols, str):
-                symbols = [symbols]
+        response = self.fyers.quotes(data)
+        
+        if response.get('s') == 'ok':
+            logger.info("Quotes fetched for %d symbols", len(symbols))
+        else:
+            logger.error("Failed to fetch quotes: %s", response)
+        
+        return response
+    
+    def get_quotes_batch(self, symbols):
+        """
+        Get quotes for many symbols as a columnar QuoteBatch
+        
+        Symbols are fetched in chunks of config.MAX_QUOTE_SYMBOLS and
+        transposed into one NumPy array per field.
+        
+        Args:
+            symbols: List of symbols
             
-            data = {
-                "symbols": ",".join(symbols)
-            }
+        Returns:
+            QuoteBatch: Quote columns, or None if a quotes request failed
+        """
+        quotes = []
+        
+        for start in range(0, len(symbols), config.MAX_QUOTE_SYMBOLS):
+            response = self.get_quotes(symbols[start:start + config.MAX_QUOTE_SYMBOLS])
             
-            response = self.fyers.quotes(data)
+            if not response or response.get('s') != 'ok' or 'd' not in response:
+                return None
             
-            if response.get('s') == 'ok':
-                logger.info(f"Quotes fetched for {len(symbols)} symbols")
-            else:
-                logger.error(f"Failed to fetch quotes: {response}")
+            quotes.extend(response['d'])
+        
+        return QuoteBatch.from_quotes(quotes)
+    
+    async def get_quotes_async(self, symbols):
+        """
+        Get real-time quotes without blocking the event loop
+        
+        Args:
+            symbols: List of symbols or single symbol string
             
-            return response
+        Returns:
+            dict: Quote data
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        
+        response = await self.http.get("/quotes", {"symbols": ",".join(symbols)}, data_api=True)
+        
+        if response.get('s') == 'ok':
+            logger.info("Quotes fetched for %d symbols", len(symbols))
+        else:
+            logger.error("Failed to fetch quotes: %s", response)
+        
+        return response
+    
+    @fyers_call("starting depth stream", default=False)
+    def start_depth_stream(self, symbols):
+        """
+        Start streaming market depth over the Fyers depth socket
+        
+        While the stream is connected, get_depth() returns the local book for
+        subscribed symbols instead of polling REST.
+        
+        Args:
+            symbols: Symbols to stream depth for
             
-        except Exception as e:
-            logger.error(f"Error fetching quotes: {e}")
-            return None
+        Returns:
+            bool: True if the stream is running
+        """
+        if not self.fyers:
+            logger.error("Fyers client not initialized")
+            return False
+        
+        if self.depth_stream is None:
+            self.depth_stream = DepthStream(self.fyers.header)
+        
+        if self.depth_stream.is_running:
+            self.depth_stream.subscribe(symbols)
+        else:
+            self.depth_stream.start(symbols)
+        return True
+    
+    def stop_depth_stream(self):
+        """
+        Stop the depth stream; get_depth() goes back to REST
+        """
+        if self.depth_stream is not None:
+            self.depth_stream.stop()
     
     def get_depth(self, symbol):
         """
@@ -131,29 +478,40 @@ class MarketData:
         Returns:
             dict: Market depth data
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return None
-        
-        try:
-            data = {
-                "symbol": symbol,
-                "ohlcv_flag": "1"
-            }
-            
-            response = self.fyers.depth(data)
+        if self.depth_stream is not None and self.depth_stream.is_live:
+            depth = self.depth_stream.get_depth(symbol)
             
-            if response.get('s') == 'ok':
-                logger.info(f"Market depth fetched for {symbol}")
-            else:
-                logger.error(f"Failed to fetch market depth: {response}")
-            
-            return response
+            if depth is not None:
+                return depth
+        
+        return self._rest_depth(symbol)
+    
+    @fyers_call("fetching market depth", default=None)
+    def _rest_depth(self, symbol):
+        """
+        Fetch market depth for a symbol over REST
+        
+        Args:
+            symbol: Trading symbol
             
-        except Exception as e:
-            logger.error(f"Error fetching market depth: {e}")
-            return None
+        Returns:
+            dict: Market depth data
+        """
+        data = {
+            "symbol": symbol,
+            "ohlcv_flag": "1"
+        }
+        
+        response = self.fyers.depth(data)
+        
+        if response.get('s') == 'ok':
+            logger.info("Market depth fetched for %s", symbol)
+        else:
+            logger.error("Failed to fetch market depth: %s", response)
+        
+        return response
     
+    @fyers_call("fetching option chain", default=None)
     def get_option_chain(self, symbol, expiry=None):
         """
         Get options chain data
@@ -165,27 +523,19 @@ class MarketData:
         Returns:
             dict: Option chain data
         """
-        if not self.fyers:
-            logger.error("Fyers client not initialized")
-            return None
+        # Get symbol info first to find strikes
+        data = {
+            "symbol": symbol
+        }
         
-        try:
-            # Get symbol info first to find strikes
-            data = {
-                "symbol": symbol
-            }
-            
-            # Note: Fyers API v3 doesn't have direct option chain endpoint
-            # We need to construct option symbols and fetch quotes
-            # This is a simplified implementation
-            
-            logger.warning("Option chain fetching requires manual symbol construction")
-            return {"s": "error", "message": "Option chain not directly supported"}
-            
-        except Exception as e:
-            logger.error(f"Error fetching option chain: {e}")
-            return None
+        # Note: Fyers API v3 doesn't have direct option chain endpoint
+        # We need to construct option symbols and fetch quotes
+        # This is a simplified implementation
+        
+        logger.warning("Option chain fetching requires manual symbol construction")
+        return {"s": "error", "message": "Option chain not directly supported"}
     
+    @fyers_call("searching symbols", default=None)
     def search_symbols(self, query):
         """
         Search for symbols
@@ -196,28 +546,50 @@ class MarketData:
         Returns:
             dict: Search results
         """
+        data = {
+            "symbol": query,
+            "n": 10  # Number of results
+        }
+        
+        response = self.fyers.search_syms(data)
+        
+        if response.get('s') == 'ok':
+            logger.info("Symbol search completed for: %s", query)
+        else:
+            logger.error("Symbol search failed: %s", response)
+        
+        return response
+    
+    @fyers_call("starting quote stream", default=False)
+    def start_quote_stream(self, symbols=None):
+        """
+        Start streaming LTPs over the Fyers data socket
+        
+        While the stream is connected, get_current_price() is served from
+        memory and only falls back to REST for symbols that have not ticked yet.
+        
+        Args:
+            symbols: Symbols to subscribe to up front (optional)
+            
+        Returns:
+            bool: True if the stream is running
+        """
         if not self.fyers:
             logger.error("Fyers client not initialized")
-            return None
+            return False
         
-        try:
-            data = {
-                "symbol": query,
-                "n": 10  # Number of results
-            }
-            
-            response = self.fyers.search_syms(data)
-            
-            if response.get('s') == 'ok':
-                logger.info(f"Symbol search completed for: {query}")
-            else:
-                logger.error(f"Symbol search failed: {response}")
-            
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error searching symbols: {e}")
-            return None
+        if self.quote_stream is None:
+            self.quote_stream = QuoteStream(self.fyers.header)
+        
+        self.quote_stream.start(symbols)
+        return True
+    
+    def stop_quote_stream(self):
+        """
+        Stop the LTP stream; get_current_price() goes back to REST
+        """
+        if self.quote_stream is not None:
+            self.quote_stream.stop()
     
     def get_current_price(self, symbol):
         """
@@ -229,6 +601,15 @@ class MarketData:
         Returns:
             float: Current price, or None if error
         """
+        if self.quote_stream is not None and self.quote_stream.is_live:
+            ltp = self.quote_stream.get_ltp(symbol)
+            
+            if ltp is not None:
+                return float(ltp)
+            
+            # Not streamed yet - subscribe and answer this call over REST
+            self.quote_stream.subscribe([symbol])
+        
         quotes = self.get_quotes(symbol)
         
         if quotes and quotes.get('s') == 'ok' and 'd' in quotes:
@@ -248,21 +629,46 @@ class MarketData:
         Returns:
             dict: {'ltp': float, 'change': float, 'change_pct': float}
         """
-        quotes = self.get_quotes(symbol)
+        batch = self.calculate_ltp_change_batch([symbol])
         
-        if quotes and quotes.get('s') == 'ok' and 'd' in quotes:
-            symbol_data = quotes['d'][0]['v']
-            
-            ltp = float(symbol_data.get('lp', 0))
-            prev_close = float(symbol_data.get('prev_close_price', ltp))
-            
-            change = ltp - prev_close
-            change_pct = (change / prev_close * 100) if prev_close != 0 else 0
+        if batch is None or np.isnan(batch['ltp'][0]):
+            return None
+        
+        return {
+            'ltp': float(batch['ltp'][0]),
+            'change': float(batch['change'][0]),
+            'change_pct': float(batch['change_pct'][0])
+        }
+    
+    def calculate_ltp_change_batch(self, symbols):
+        """
+        Calculate LTP change for many symbols in one vectorized pass
+        
+        Args:
+            symbols: List of trading symbols
             
-            return {
-                'ltp': ltp,
-                'change': change,
-                'change_pct': change_pct
-            }
+        Returns:
+            dict: {'symbols': list, 'ltp': ndarray, 'change': ndarray, 'change_pct': ndarray}
+                  with NaN for symbols that returned no quote, or None if the
+                  quotes request failed
+        """
+        batch = self.get_quotes_batch(symbols)
         
-        return None
+        if batch is None:
+            return None
+        
+        positions = batch.positions(symbols)
+        ltp = batch.gather(batch.ltp, positions)
+        prev_close = batch.gather(batch.prev_close, positions)
+        
+        change = ltp - prev_close
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change_pct = np.where(prev_close != 0, change / prev_close * 100, 0.0)
+        
+        return {
+            'symbols': list(symbols),
+            'ltp': ltp,
+            'change': change,
+            'change_pct': change_pct
+        }
@@ -0,0 +1,165 @@
+"""
+Order Batcher
+Coalesces order submissions into Fyers basket requests
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class OrderBatcher:
+    """
+    Micro-batcher for order placement and cancellation
+
+    Orders submitted within a short window are flushed together as one
+    basket request by a background thread, so strategies that place orders
+    in tight loops pay one round-trip per batch instead of one per order.
+    """
+
+    def __init__(self, fyers_client, interval=0.1, max_batch_size=None):
+        """
+        Initialize Order Batcher
+
+        Args:
+            fyers_client: FyersClient instance used to send the batches
+            interval: Seconds to wait for more orders before flushing (default: 100 ms)
+            max_batch_size: Flush as soon as this many orders are queued
+                            (default: config.MAX_BASKET_ORDERS)
+        """
+        self.fyers_client = fyers_client
+        self.interval = interval
+        self.max_batch_size = max_batch_size or config.MAX_BASKET_ORDERS
+
+        self.enabled = False
+
+        # Pending (payload, Future) pairs
+        self.pending_orders = []
+        self.pending_cancels = []
+
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """
+        Start the background flush thread
+        """
+        with self._condition:
+            if self.enabled:
+                return
+            self.enabled = True
+
+        self._thread = threading.Thread(target=self._run, name="OrderBatcher", daemon=True)
+        self._thread.start()
+        logger.info("Order batching enabled (interval: %ss, max batch: %s)", self.interval, self.max_batch_size)
+
+    def stop(self):
+        """
+        Stop the background thread after flushing anything still queued
+        """
+        with self._condition:
+            if not self.enabled:
+                return
+            self.enabled = False
+            self._condition.notify_all()
+
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+        logger.info("Order batching disabled")
+
+    def submit(self, order):
+        """
+        Queue an order for the next batch
+
+        Args:
+            order: Dict with the same keys as FyersClient.place_order() arguments
+
+        Returns:
+            Future: Resolves to the order response dict
+        """
+        future = Future()
+
+        with self._condition:
+            if self.enabled:
+                self.pending_orders.append((order, future))
+                self._condition.notify_all()
+                return future
+
+        future.set_result(self.fyers_client.place_orders_batch([order])[0])
+        return future
+
+    def submit_cancel(self, order_id):
+        """
+        Queue an order cancellation for the next batch
+
+        Args:
+            order_id: Order ID to cancel
+
+        Returns:
+            Future: Resolves to the cancellation response dict
+        """
+        future = Future()
+
+        with self._condition:
+            if self.enabled:
+                self.pending_cancels.append((order_id, future))
+                self._condition.notify_all()
+                return future
+
+        future.set_result(self.fyers_client.cancel_orders_batch([order_id])[0])
+        return future
+
+    def _run(self):
+        """
+        Background loop - wait for work, hold the window open, then flush
+        """
+        while True:
+            with self._condition:
+                while self.enabled and not self.pending_orders and not self.pending_cancels:
+                    self._condition.wait()
+
+                if not self.pending_orders and not self.pending_cancels:
+                    return
+
+                # Keep collecting until the window closes or a batch is full
+                deadline = time.monotonic() + self.interval
+                while self.enabled and len(self.pending_orders) < self.max_batch_size \
+                        and len(self.pending_cancels) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                orders = self.pending_orders[:self.max_batch_size]
+                cancels = self.pending_cancels[:self.max_batch_size]
+                del self.pending_orders[:len(orders)]
+                del self.pending_cancels[:len(cancels)]
+
+            if orders:
+                self._flush(orders, self.fyers_client.place_orders_batch)
+            if cancels:
+                self._flush(cancels, self.fyers_client.cancel_orders_batch)
+
+    def _flush(self, pending, send):
+        """
+        Send one batch and resolve each Future with its response
+
+        Args:
+            pending: List of (payload, Future) pairs
+            send: Batch method on FyersClient
+        """
+        try:
+            responses = send([payload for payload, _ in pending])
+        except Exception as e:
+            logger.error("Error flushing order batch: %s", e)
+            responses = [{"s": "error", "message": str(e)} for _ in pending]
+
+        for (_, future), response in zip(pending, responses):
+            future.set_result(response)
+
+        logger.info("Flushed batch of %d requests", len(pending))
@@ -0,0 +1,97 @@
+"""
+Order encoder
+Fixed-schema JSON encoding for Fyers order payloads
+"""
+import functools
+import math
+from api import fast_json
+
+_PRICE_KEY = b'"limitPrice":'
+
+
+# typed: 0, 0.0 and False are equal as keys but encode differently
+@functools.lru_cache(maxsize=512, typed=True)
+def _order_template(symbol, quantity, order_type, side, product_type, validity,
+                    stop_loss, take_profit):
+    """
+    Encode everything but the limit price once per order shape
+
+    Returns:
+        tuple: (prefix, suffix) bytes around the limitPrice value
+    """
+    body = fast_json.dumps({
+        "symbol": symbol,
+        "qty": quantity,
+        "type": order_type,
+        "side": side,
+        "productType": product_type,
+        "limitPrice": 0,
+        "stopPrice": 0,
+        "validity": validity,
+        "disclosedQty": 0,
+        "offlineOrder": False,
+        "stopLoss": stop_loss,
+        "takeProfit": take_profit
+    })
+
+    price_start = body.index(_PRICE_KEY) + len(_PRICE_KEY)
+    price_end = body.index(b',', price_start)
+    return body[:price_start], body[price_end:]
+
+
+def format_price(price):
+    """
+    Format a price as a JSON number
+
+    Plain ints/floats use repr(); anything else (e.g. NumPy float32 prices)
+    goes through orjson so it gets the shortest round-trip form. NaN and
+    infinite prices have no JSON form and raise ValueError.
+
+    Args:
+        price: Price as int, float or NumPy scalar
+
+    Returns:
+        bytes: JSON number
+    """
+    if not math.isfinite(price):
+        raise ValueError(f"Invalid order price: {price}")
+    if type(price) is float or type(price) is int:
+        return repr(price).encode()
+    return fast_json.dumps(price)
+
+
+def encode_order(symbol, quantity, order_type, side, product_type, limit_price,
+                 validity, stop_loss, take_profit):
+    """
+    Encode an order payload
+
+    Strategies resend the same symbol/side/quantity with a new price, so
+    the rest of the document is cached and only the price is formatted.
+
+    Args:
+        symbol: Trading symbol
+        quantity: Order quantity
+        order_type: Fyers order type code (config.ORDER_TYPE_*)
+        side: 1 for BUY, -1 for SELL
+        product_type: Product type - INTRADAY, MARGIN, CNC
+        limit_price: Limit price (0 for MARKET)
+        validity: Validity - DAY, IOC
+        stop_loss: Stop loss price
+        take_profit: Take profit price
+
+    Returns:
+        bytes: JSON document
+    """
+    prefix, suffix = _order_template(symbol, quantity, order_type, side, product_type,
+                                     validity, stop_loss, take_profit)
+    return prefix + format_price(limit_price) + suffix
+
+
+# Fail at import, not on the first live order, if the splice point is wrong
+if fast_json.loads(encode_order("NSE:SBIN-EQ", 1, 1, 1, "INTRADAY", 101.5, "DAY", 0, 0)) != {
+    "symbol": "NSE:SBIN-EQ", "qty": 1, "type": 1, "side": 1, "productType": "INTRADAY",
+    "limitPrice": 101.5, "stopPrice": 0, "validity": "DAY", "disclosedQty": 0,
+    "offlineOrder": False, "stopLoss": 0, "takeProfit": 0
+}:
+    raise ImportError("Encoded order does not match the Fyers order schema")
+_order_template.cache_clear()
@@ -0,0 +1,172 @@
+"""
+Order Stream
+Orderbook and positions cache fed by the Fyers v3 order WebSocket
+"""
+import logging
+import threading
+from fyers_apiv3.FyersWebsocket import order_ws
+
+logger = logging.getLogger(__name__)
+
+# Socket data types pushed to us
+ORDER_STREAM_TYPES = "OnOrders,OnPositions"
+
+
+class OrderStream:
+    """
+    Orders and positions kept current by the Fyers order socket
+
+    The cache is seeded from REST every time the socket (re)connects and
+    then patched by pushed updates, so readers never have to poll. Entries
+    use the REST field names and get_orders()/get_positions() return
+    REST-shaped responses. Note that fyers_apiv3's FyersOrderSocket is a
+    process-wide singleton, so only one stream should be running.
+    """
+
+    def __init__(self, access_token, snapshot):
+        """
+        Initialize order stream
+
+        Args:
+            access_token: Fyers socket token ("client_id:access_token")
+            snapshot: Callable returning (orderbook response, positions response)
+                      from REST, used to seed the cache on connect
+        """
+        self.access_token = access_token
+        self.snapshot = snapshot
+        self.socket = None
+        self.is_running = False
+        self.is_seeded = False
+
+        # order id -> order, position id -> position
+        self._orders = {}
+        self._positions = {}
+
+        # Bumped on every change so readers can skip unchanged data
+        self.version = 0
+
+    @property
+    def is_live(self):
+        """True once the socket is connected and the cache has been seeded"""
+        return self.is_running and self.is_seeded and self.socket.is_connected()
+
+    def start(self):
+        """
+        Connect the order socket in the background
+        """
+        if self.is_running:
+            logger.warning("Order stream already running")
+            return
+
+        self.socket = order_ws.FyersOrderSocket(
+            access_token=self.access_token,
+            write_to_file=False,
+            log_path="",
+            on_orders=self._on_orders,
+            on_positions=self._on_positions,
+            on_error=self._on_error,
+            on_connect=self._on_connect,
+            on_close=self._on_close,
+            reconnect=True
+        )
+        self.is_running = True
+
+        # The SDK sleeps while the socket opens, keep that off the caller's thread
+        threading.Thread(target=self.socket.connect, daemon=True).start()
+
+        logger.info("Order stream started")
+
+    def stop(self):
+        """
+        Close the order socket
+        """
+        if self.socket is not None:
+            self.socket.close_connection()
+
+        self.is_running = False
+        self.is_seeded = False
+        logger.info("Order stream stopped")
+
+    def get_orders(self):
+        """
+        Get the streamed orderbook
+
+        Returns:
+            dict: Orderbook response in the REST shape
+        """
+        return {"s": "ok", "code": 200, "orderBook": list(self._orders.values())}
+
+    def get_positions(self):
+        """
+        Get the streamed positions
+
+        Returns:
+            dict: Positions response in the REST shape
+        """
+        return {"s": "ok", "code": 200, "netPositions": list(self._positions.values())}
+
+    def _seed(self):
+        """
+        Replace the cache with a REST snapshot
+        """
+        orders, positions = self.snapshot()
+
+        if orders.get('s') != 'ok' or positions.get('s') != 'ok':
+            logger.error("Order stream seed failed: %s / %s", orders, positions)
+            self.is_seeded = False
+            return
+
+        self._orders = self._by_id(orders.get('orderBook'))
+        self._positions = self._by_id(positions.get('netPositions'))
+        self.is_seeded = True
+        self.version += 1
+
+    @staticmethod
+    def _by_id(records):
+        """
+        Index snapshot records by id, skipping any without one
+
+        Returns:
+            dict: id -> record
+        """
+        return {record['id']: record for record in records or [] if record.get('id') is not None}
+
+    @staticmethod
+    def _merge(cache, update):
+        """
+        Apply one pushed order/position update
+
+        Returns:
+            bool: True if the cache changed
+        """
+        if not update or 'id' not in update:
+            return False
+
+        entry_id = update['id']
+        cache[entry_id] = {**cache.get(entry_id, {}), **update}
+        return True
+
+    def _on_connect(self):
+        """
+        Socket callback - reseed (updates may have been missed while down) and subscribe
+        """
+        try:
+            self._seed()
+        except Exception as e:
+            logger.error("Error seeding order stream: %s", e)
+
+        self.socket.subscribe(data_type=ORDER_STREAM_TYPES)
+
+    def _on_orders(self, message):
+        if message and self._merge(self._orders, message.get('orders')):
+            self.version += 1
+
+    def _on_positions(self, message):
+        if message and self._merge(self._positions, message.get('positions')):
+            self.version += 1
+
+    def _on_error(self, message):
+        logger.error("Order stream error: %s", message)
+
+    def _on_close(self, message):
+        logger.info("Order stream closed: %s", message)
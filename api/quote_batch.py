@@ -0,0 +1,121 @@
+"""
+Quote Batch
+Columnar (struct-of-arrays) view of a Fyers quotes response
+"""
+from dataclasses import dataclass, field
+import numpy as np
+
+
+@dataclass
+class QuoteBatch:
+    """
+    Quotes for many symbols stored as one NumPy array per field
+
+    Vectorized consumers read whole columns; code that wants the old
+    per-symbol dict can still use batch[symbol].
+    """
+    symbols: list
+    ltp: np.ndarray
+    prev_close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    volume: np.ndarray
+    index: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_quotes(cls, quotes):
+        """
+        Transpose the 'd' list of a quotes response into columns
+
+        Args:
+            quotes: List of quote entries ({'n': symbol, 'v': {...}})
+
+        Returns:
+            QuoteBatch: One row per quote that carries a last price
+        """
+        rows = [
+            (quote['n'], quote['v']) for quote in quotes
+            if isinstance(quote.get('v'), dict) and 'lp' in quote['v']
+        ]
+        count = len(rows)
+
+        ltp = np.empty(count, dtype=np.float64)
+        prev_close = np.empty(count, dtype=np.float64)
+        high = np.empty(count, dtype=np.float64)
+        low = np.empty(count, dtype=np.float64)
+        volume = np.empty(count, dtype=np.int64)
+        symbols = []
+
+        for i, (symbol, values) in enumerate(rows):
+            last_price = values['lp']
+            ltp[i] = last_price
+            prev_close[i] = values.get('prev_close_price', last_price)
+            high[i] = values.get('high_price', last_price)
+            low[i] = values.get('low_price', last_price)
+            volume[i] = values.get('volume', 0)
+            symbols.append(symbol)
+
+        return cls(
+            symbols=symbols,
+            ltp=ltp,
+            prev_close=prev_close,
+            high=high,
+            low=low,
+            volume=volume,
+            index={symbol: i for i, symbol in enumerate(symbols)}
+        )
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def __getitem__(self, symbol):
+        """
+        Rebuild one symbol's quote values in the REST shape
+
+        Args:
+            symbol: Trading symbol
+
+        Returns:
+            dict: {'lp', 'prev_close_price', 'high_price', 'low_price', 'volume'}
+        """
+        i = self.index[symbol]
+        return {
+            'lp': float(self.ltp[i]),
+            'prev_close_price': float(self.prev_close[i]),
+            'high_price': float(self.high[i]),
+            'low_price': float(self.low[i]),
+            'volume': int(self.volume[i])
+        }
+
+    def positions(self, symbols):
+        """
+        Look up row positions for the given symbols
+
+        Args:
+            symbols: List of trading symbols
+
+        Returns:
+            ndarray: Row position per symbol, -1 where the symbol has no quote
+        """
+        return np.fromiter((self.index.get(symbol, -1) for symbol in symbols),
+                           dtype=np.intp, count=len(symbols))
+
+    @staticmethod
+    def gather(column, positions):
+        """
+        Read a column at the given row positions
+
+        Args:
+            column: One of the price columns
+            positions: Array from positions()
+
+        Returns:
+            ndarray: float64 values, NaN where the position is -1
+        """
+        found = positions >= 0
+        values = np.full(len(positions), np.nan)
+        values[found] = column[positions[found]]
+        return values
@@ -0,0 +1,142 @@
+"""
+Quote Stream
+Latest-price cache fed by the Fyers v3 data WebSocket
+"""
+import logging
+import threading
+from fyers_apiv3.FyersWebsocket import data_ws
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteStream:
+    """
+    In-memory LTP cache updated by the Fyers data socket in lite mode
+
+    Lite mode only pushes the last traded price, which keeps bandwidth
+    and per-message work minimal. Note that fyers_apiv3's FyersDataSocket
+    is a process-wide singleton, so only one stream should be running.
+    """
+
+    def __init__(self, access_token):
+        """
+        Initialize quote stream
+
+        Args:
+            access_token: Fyers socket token ("client_id:access_token")
+        """
+        self.access_token = access_token
+        self.socket = None
+        self.is_running = False
+
+        # symbol -> last traded price
+        self._latest = {}
+        self._subscribed = set()
+        self._subscribe_lock = threading.Lock()
+
+    @property
+    def is_live(self):
+        """True while the stream is running and its socket is connected"""
+        return self.is_running and self.socket.is_connected()
+
+    def start(self, symbols=None):
+        """
+        Connect the data socket and subscribe to the given symbols
+
+        Args:
+            symbols: List of symbols to subscribe to (optional)
+        """
+        if self.is_running:
+            logger.warning("Quote stream already running")
+            return
+
+        self.socket = data_ws.FyersDataSocket(
+            access_token=self.access_token,
+            log_path="",
+            litemode=True,
+            write_to_file=False,
+            reconnect=True,
+            on_message=self._on_message,
+            on_error=self._on_error,
+            on_close=self._on_close
+        )
+        self.socket.connect()
+        self.is_running = True
+
+        logger.info("Quote stream started")
+
+        if symbols:
+            self.subscribe(symbols)
+
+    def stop(self):
+        """
+        Close the data socket
+        """
+        if self.socket is not None:
+            self.socket.close_connection()
+
+        self.is_running = False
+        self._subscribed.clear()
+        self._latest.clear()
+        logger.info("Quote stream stopped")
+
+    def subscribe(self, symbols):
+        """
+        Subscribe to more symbols without blocking the caller
+
+        Args:
+            symbols: List of symbols
+        """
+        with self._subscribe_lock:
+            new_symbols = [symbol for symbol in symbols if symbol not in self._subscribed]
+            room = config.MAX_STREAM_SYMBOLS - len(self._subscribed)
+
+            if len(new_symbols) > room:
+                logger.warning("Quote stream limit reached, skipping %d symbols", len(new_symbols) - room)
+                new_symbols = new_symbols[:max(room, 0)]
+
+            if not new_symbols:
+                return
+
+            self._subscribed.update(new_symbols)
+
+        # The SDK sleeps between subscription messages, keep that off the caller's thread
+        threading.Thread(
+            target=self.socket.subscribe,
+            kwargs={'symbols': new_symbols, 'data_type': "SymbolUpdate"},
+            daemon=True
+        ).start()
+
+    def get_ltp(self, symbol):
+        """
+        Get the latest streamed price for a symbol
+
+        Args:
+            symbol: Trading symbol
+
+        Returns:
+            float: Last traded price, or None if no tick has arrived yet
+        """
+        return self._latest.get(symbol)
+
+    def _on_message(self, message):
+        """
+        Socket callback - store the latest price
+
+        A single dict assignment is atomic under the GIL, so no lock is needed.
+        """
+        symbol = message.get('symbol')
+        ltp = message.get('ltp')
+
+        if symbol is not None and ltp is not None:
+            self._latest[symbol] = ltp
+
+    def _on_error(self, message):
+        logger.error("Quote stream error: %s", message)
+
+    def _on_close(self, message):
+        # Prices stop updating while the socket is down; drop them so callers
+        # fall back to REST until fresh ticks arrive after a reconnect
+        self._latest.clear()
+        logger.info("Quote stream closed: %s", message)
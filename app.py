@@ -2,19 +2,14 @@
 Fyers Algo Trading Application
 Streamlit-based UI for automated trading with Fyers API
 """
+import re
 import streamlit as st
 import logging
 from datetime import datetime
-import pandas as pd
-import plotly.graph_objects as go
 
 # Import modules
 import config
 from auth.fyers_auth import FyersAuth
-from api.fyers_client import FyersClient
-from api.market_data import MarketData
-from strategies.ema_options import EMAOptionsStrategy
-from webhook.server import WebhookServer
 from utils.helpers import format_price, format_pnl, is_market_open
 
 # Setup logging
@@ -28,8 +23,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Sidebar logo, served from ./static (server.enableStaticServing) so browsers cache it
+LOGO_URL = "app/static/logo.png"
+
 # Custom CSS
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -69,35 +67,179 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+@st.cache_resource
+def minified_css():
+    """Custom CSS with whitespace stripped, computed once per server"""
+    css = re.sub(r'/\*.*?\*/', '', CUSTOM_CSS, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{}:;,>])\s*', r'\1', css).replace(';}', '}').strip()
+
+
+# Elements only live for one run, so the style tag is re-emitted every rerun
+st.markdown(minified_css(), unsafe_allow_html=True)
 
 # Initialize session state
-if 'authenticated' not in st.session_state:
-    st.session_state.authenticated = False
-if 'fyers_auth' not in st.session_state:
-    st.session_state.fyers_auth = None
-if 'fyers_client' not in st.session_state:
-    st.session_state.fyers_client = None
-if 'market_data' not in st.session_state:
-    st.session_state.market_data = None
-if 'strategy' not in st.session_state:
-    st.session_state.strategy = None
-if 'webhook_server' not in st.session_state:
-    st.session_state.webhook_server = None
-if 'access_token' not in st.session_state:
-    st.session_state.access_token = None
-
-
-def initialize_components():
-    """Initialize trading components after authentication"""
-    if st.session_state.fyers_auth and st.session_state.fyers_auth.fyers:
-        # Initialize API client
-        if not st.session_state.fyers_client:
-            st.session_state.fyers_client = FyersClient(st.session_state.fyers_auth.fyers)
-        
-        # Initialize market data
-        if not st.session_state.market_data:
-            st.session_state.market_data = MarketData(st.session_state.fyers_auth.fyers)
+SESSION_DEFAULTS = {
+    'authenticated': False,
+    'fyers_auth': None,
+    'strategy': None,
+    'access_token': None,
+    'token_restore_tried': False
+}
+
+for key, value in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
+
+# Resume from a token saved earlier today instead of repeating OAuth
+# (once per session, not on every unauthenticated rerun)
+if not st.session_state.authenticated and not st.session_state.token_restore_tried:
+    st.session_state.token_restore_tried = True
+    saved_auth = FyersAuth.load_token()
+    
+    if saved_auth:
+        st.session_state.fyers_auth = saved_auth
+        st.session_state.access_token = saved_auth.access_token
+        st.session_state.authenticated = True
+
+
+@st.cache_resource(show_spinner=False)
+def get_fyers_client(_auth, access_token):
+    """Trading client for the given token, shared across reruns and sessions"""
+    from api.fyers_client import FyersClient
+    
+    client = FyersClient(_auth.fyers)
+    
+    # Orders/positions are pushed over a socket rather than polled per rerun
+    client.start_order_stream()
+    return client
+
+
+@st.cache_resource(show_spinner=False)
+def get_market_data(_auth, access_token):
+    """Market data handler for the given token, shared across reruns and sessions"""
+    from api.market_data import MarketData
+    from utils import indicators
+    
+    # Compile the batch indicator kernels once per process, not on first use
+    indicators.warm_up()
+    return MarketData(_auth.fyers)
+
+
+def webhook_trade_callback(webhook_data):
+    """Handle a validated webhook signal"""
+    logger.info(f"Webhook callback triggered: {webhook_data}")
+    # Here you would execute the trade
+    # For demo, just log it
+    return {"status": "received", "mode": config.TRADING_MODE}
+
+
+@st.cache_resource(show_spinner=False)
+def get_webhook_server():
+    """Process-wide webhook server"""
+    from webhook.server import WebhookServer
+    
+    server = WebhookServer()
+    server.set_trade_callback(webhook_trade_callback)
+    return server
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_profile(_auth, access_token):
+    """Profile lookup, memoized per access token across reruns"""
+    return _auth.get_profile()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_funds(_auth, access_token):
+    """Funds lookup, memoized per access token across reruns"""
+    return _auth.get_funds()
+
+
+POSITION_COLUMNS = ['symbol', 'netQty', 'avgPrice', 'ltp', 'pl']
+ORDER_COLUMNS = ['symbol', 'qty', 'type', 'status', 'orderDateTime']
+
+POSITION_COLUMN_CONFIG = {
+    'symbol': st.column_config.TextColumn("Symbol"),
+    'netQty': st.column_config.NumberColumn("Net Qty"),
+    'avgPrice': st.column_config.NumberColumn("Avg Price", format="%.2f"),
+    'ltp': st.column_config.NumberColumn("LTP", format="%.2f"),
+    'pl': st.column_config.NumberColumn("P&L", format="%.2f")
+}
+ORDER_COLUMN_CONFIG = {
+    'symbol': st.column_config.TextColumn("Symbol"),
+    'qty': st.column_config.NumberColumn("Qty"),
+    'type': st.column_config.NumberColumn("Type"),
+    'status': st.column_config.NumberColumn("Status"),
+    'orderDateTime': st.column_config.TextColumn("Time")
+}
+
+# Strategy page choices, resolved to Fyers values once at import
+UNDERLYING_SYMBOLS = {
+    "NIFTY": config.NIFTY_SYMBOL,
+    "BANKNIFTY": config.BANKNIFTY_SYMBOL
+}
+STRATEGY_TIMEFRAMES = {
+    name: config.CANDLE_TIMEFRAMES[name] for name in ("1min", "5min", "15min")
+}
+
+TRADE_COLUMN_CONFIG = {
+    'entry_price': st.column_config.NumberColumn("Entry", format="₹%.2f"),
+    'exit_price': st.column_config.NumberColumn("Exit", format="₹%.2f"),
+    'stop_loss': st.column_config.NumberColumn("Stop Loss", format="₹%.2f"),
+    'target': st.column_config.NumberColumn("Target", format="₹%.2f"),
+    'pnl': st.column_config.NumberColumn("P&L", format="₹%.2f"),
+    'pnl_pct': st.column_config.NumberColumn("P&L %", format="%.2f%%")
+}
+
+
+def _records_table(response, key, columns):
+    """
+    Build a table from one list in an API response
+    
+    Returns:
+        tuple: (ok, DataFrame or None when the list is empty)
+    """
+    if not response or response.get('s') != 'ok':
+        return False, None
+    
+    records = response.get(key)
+    if not records:
+        return True, None
+    
+    import pandas as pd
+    
+    return True, pd.DataFrame.from_records(records, columns=columns)
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _positions_table(_client, access_token, stream_version):
+    """Positions table, memoized per access token and order stream version"""
+    return _records_table(_client.get_positions(), 'netPositions', POSITION_COLUMNS)
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _orders_table(_client, access_token, stream_version):
+    """Orderbook table, memoized per access token and order stream version"""
+    return _records_table(_client.get_orders(), 'orderBook', ORDER_COLUMNS)
+
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def _webhook_log_table(_server, log_version, limit=20):
+    """Recent webhook logs table, rebuilt only when the log version changes"""
+    import pandas as pd
+    
+    return pd.DataFrame.from_records(_server.get_logs(limit=limit))
+
+
+def clear_account_cache():
+    """Drop memoized account lookups so the next rerun hits the API"""
+    _cached_profile.clear()
+    _cached_funds.clear()
+    _positions_table.clear()
+    _orders_table.clear()
 
 
 def login_page():
@@ -120,45 +262,49 @@ def login_page():
     st.subheader("📋 API Credentials")
     st.markdown("Get your credentials from [Fyers API Dashboard](https://myapi.fyers.in/dashboard/)")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        client_id = st.text_input("Client ID (App ID)", value=config.FYERS_CLIENT_ID, type="password")
-    
-    with col2:
-        secret_key = st.text_input("Secret Key", value=config.FYERS_SECRET_KEY, type="password")
-    
-    redirect_url = st.text_input("Redirect URL", value=config.FYERS_REDIRECT_URL)
-    
-    st.markdown("---")
-    
-    # Authentication flow
-    col1, col2, col3 = st.columns([1, 2, 1])
+    # Batch the inputs so typing doesn't rerun the page on every change
+    with st.form("login_form", clear_on_submit=False):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            client_id = st.text_input("Client ID (App ID)", value=config.FYERS_CLIENT_ID, type="password")
+        
+        with col2:
+            secret_key = st.text_input("Secret Key", value=config.FYERS_SECRET_KEY, type="password")
+        
+        redirect_url = st.text_input("Redirect URL", value=config.FYERS_REDIRECT_URL)
+        
+        st.markdown("---")
+        
+        # Authentication flow
+        col1, col2, col3 = st.columns([1, 2, 1])
+        
+        with col2:
+            submitted = st.form_submit_button("🚀 Login with Fyers", use_container_width=True, type="primary")
     
-    with col2:
-        if st.button("🚀 Login with Fyers", use_container_width=True, type="primary"):
-            if not client_id or not secret_key:
-                st.error("Please enter both Client ID and Secret Key")
-            else:
-                try:
-                    # Initialize auth
-                    auth = FyersAuth(client_id, secret_key, redirect_url)
-                    
-                    if not auth.validate_credentials():
-                        st.error("Invalid credentials format")
-                        return
-                    
-                    # Generate auth URL
-                    auth_url = auth.generate_auth_url()
-                    
-                    st.session_state.fyers_auth = auth
-                    st.session_state.auth_url = auth_url
-                    
-                    st.success("✅ Authentication URL generated!")
-                    
-                except Exception as e:
-                    st.error(f"❌ Error: {str(e)}")
-                    logger.error(f"Login error: {e}")
+    if submitted:
+        if not client_id or not secret_key:
+            st.error("Please enter both Client ID and Secret Key")
+        else:
+            try:
+                # Initialize auth
+                auth = FyersAuth(client_id, secret_key, redirect_url)
+                
+                if not auth.validate_credentials():
+                    st.error("Invalid credentials format")
+                    return
+                
+                # Generate auth URL
+                auth_url = auth.generate_auth_url()
+                
+                st.session_state.fyers_auth = auth
+                st.session_state.auth_url = auth_url
+                
+                st.success("✅ Authentication URL generated!")
+                
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
+                logger.error(f"Login error: {e}")
     
     # Show auth URL if generated
     if hasattr(st.session_state, 'auth_url'):
@@ -198,9 +344,6 @@ def login_page():
                         st.success("🎉 Successfully authenticated!")
                         st.balloons()
                         
-                        # Initialize components
-                        initialize_components()
-                        
                         st.rerun()
                     else:
                         st.error("Failed to generate access token")
@@ -214,10 +357,17 @@ def dashboard_page():
     """Main dashboard page"""
     st.markdown('<div class="main-header">📊 Trading Dashboard</div>', unsafe_allow_html=True)
     
+    if st.button("🔄 Refresh"):
+        clear_account_cache()
+    
+    token = st.session_state.access_token
+    fyers_client = get_fyers_client(st.session_state.fyers_auth, token)
+    stream_version = fyers_client.get_order_stream_version()
+    
     # Account info
     try:
-        profile = st.session_state.fyers_auth.get_profile()
-        funds = st.session_state.fyers_auth.get_funds()
+        profile = _cached_profile(st.session_state.fyers_auth, token)
+        funds = _cached_funds(st.session_state.fyers_auth, token)
         
         if profile and profile.get('s') == 'ok':
             profile_data = profile.get('data', {})
@@ -251,18 +401,15 @@ def dashboard_page():
     with col1:
         st.subheader("📍 Positions")
         try:
-            positions_response = st.session_state.fyers_client.get_positions()
+            ok, positions_df = _positions_table(fyers_client, token, stream_version)
             
-            if positions_response and positions_response.get('s') == 'ok':
-                positions = positions_response.get('netPositions', [])
-                
-                if positions:
-                    positions_df = pd.DataFrame(positions)
-                    st.dataframe(positions_df[['symbol', 'netQty', 'avgPrice', 'ltp', 'pl']] if len(positions_df.columns) > 0 else positions_df)
-                else:
-                    st.info("No open positions")
-            else:
+            if not ok:
                 st.warning("Could not fetch positions")
+            elif positions_df is None:
+                st.info("No open positions")
+            else:
+                st.dataframe(positions_df, use_container_width=True, hide_index=True,
+                             column_config=POSITION_COLUMN_CONFIG)
                 
         except Exception as e:
             st.error(f"Error fetching positions: {e}")
@@ -270,18 +417,15 @@ def dashboard_page():
     with col2:
         st.subheader("📋 Orders")
         try:
-            orders_response = st.session_state.fyers_client.get_orders()
+            ok, orders_df = _orders_table(fyers_client, token, stream_version)
             
-            if orders_response and orders_response.get('s') == 'ok':
-                orders = orders_response.get('orderBook', [])
-                
-                if orders:
-                    orders_df = pd.DataFrame(orders)
-                    st.dataframe(orders_df[['symbol', 'qty', 'type', 'status', 'orderDateTime']] if len(orders_df.columns) > 0 else orders_df)
-                else:
-                    st.info("No orders today")
-            else:
+            if not ok:
                 st.warning("Could not fetch orders")
+            elif orders_df is None:
+                st.info("No orders today")
+            else:
+                st.dataframe(orders_df, use_container_width=True, hide_index=True,
+                             column_config=ORDER_COLUMN_CONFIG)
                 
         except Exception as e:
             st.error(f"Error fetching orders: {e}")
@@ -302,43 +446,48 @@ def strategy_page():
     st.markdown("---")
     
     # Strategy Configuration
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("📊 Strategy Parameters")
-        
-        underlying = st.selectbox(
-            "Underlying Symbol",
-            options=["NIFTY", "BANKNIFTY"],
-            index=0
-        )
-        
-        underlying_symbol = config.NIFTY_SYMBOL if underlying == "NIFTY" else config.BANKNIFTY_SYMBOL
+    with st.form("strategy_form", clear_on_submit=False):
+        col1, col2 = st.columns(2)
         
-        fast_ema = st.number_input("Fast EMA Period", min_value=3, max_value=50, value=config.DEFAULT_FAST_EMA)
-        slow_ema = st.number_input("Slow EMA Period", min_value=10, max_value=200, value=config.DEFAULT_SLOW_EMA)
-        
-        timeframe = st.selectbox("Timeframe", options=["1min", "5min", "15min"], index=1)
-        
-    with col2:
-        st.subheader("💰 Risk Management")
+        with col1:
+            st.subheader("📊 Strategy Parameters")
+            
+            underlying = st.selectbox(
+                "Underlying Symbol",
+                options=list(UNDERLYING_SYMBOLS),
+                index=0
+            )
+            
+            underlying_symbol = UNDERLYING_SYMBOLS[underlying]
+            
+            fast_ema = st.number_input("Fast EMA Period", min_value=3, max_value=50, value=config.DEFAULT_FAST_EMA)
+            slow_ema = st.number_input("Slow EMA Period", min_value=10, max_value=200, value=config.DEFAULT_SLOW_EMA)
+            
+            timeframe = st.selectbox("Timeframe", options=list(STRATEGY_TIMEFRAMES), index=1)
+            
+        with col2:
+            st.subheader("💰 Risk Management")
+            
+            position_size = st.number_input("Position Size (Lots)", min_value=1, max_value=100, value=config.DEFAULT_POSITION_SIZE)
+            stop_loss_pct = st.number_input("Stop Loss %", min_value=0.5, max_value=10.0, value=config.DEFAULT_STOP_LOSS_PCT, step=0.5)
+            target_pct = st.number_input("Target %", min_value=1.0, max_value=20.0, value=config.DEFAULT_TARGET_PCT, step=0.5)
+            
+            trading_mode = st.radio("Trading Mode", options=["PAPER", "LIVE"], index=0 if config.TRADING_MODE == "PAPER" else 1)
         
-        position_size = st.number_input("Position Size (Lots)", min_value=1, max_value=100, value=config.DEFAULT_POSITION_SIZE)
-        stop_loss_pct = st.number_input("Stop Loss %", min_value=0.5, max_value=10.0, value=config.DEFAULT_STOP_LOSS_PCT, step=0.5)
-        target_pct = st.number_input("Target %", min_value=1.0, max_value=20.0, value=config.DEFAULT_TARGET_PCT, step=0.5)
+        st.markdown("---")
         
-        trading_mode = st.radio("Trading Mode", options=["PAPER", "LIVE"], index=0 if config.TRADING_MODE == "PAPER" else 1)
-    
-    st.markdown("---")
+        submitted = st.form_submit_button("Initialize Strategy", type="primary")
     
     # Initialize Strategy
-    if st.button("Initialize Strategy", type="primary"):
+    if submitted:
+        from strategies.ema_options import EMAOptionsStrategy
+        
         try:
             strategy_config = {
                 'underlying_symbol': underlying_symbol,
                 'fast_ema_period': fast_ema,
                 'slow_ema_period': slow_ema,
-                'timeframe': config.CANDLE_TIMEFRAMES.get(timeframe, '5'),
+                'timeframe': STRATEGY_TIMEFRAMES[timeframe],
                 'position_size': position_size,
                 'stop_loss_pct': stop_loss_pct,
                 'target_pct': target_pct
@@ -348,9 +497,10 @@ def strategy_page():
             config.TRADING_MODE = trading_mode
             
             # Initialize strategy
+            token = st.session_state.access_token
             strategy = EMAOptionsStrategy(
-                st.session_state.fyers_client,
-                st.session_state.market_data,
+                get_fyers_client(st.session_state.fyers_auth, token),
+                get_market_data(st.session_state.fyers_auth, token),
                 strategy_config
             )
             
@@ -406,8 +556,7 @@ def strategy_page():
             st.subheader("📜 Trade History")
             
             trades = st.session_state.strategy.get_trade_history(limit=10)
-            trades_df = pd.DataFrame(trades)
-            st.dataframe(trades_df, use_container_width=True)
+            st.dataframe(trades, use_container_width=True, column_config=TRADE_COLUMN_CONFIG)
 
 
 def webhook_page():
@@ -420,18 +569,7 @@ def webhook_page():
     Receive trading signals from TradingView alerts and execute them automatically.
     """)
     
-    # Initialize webhook server
-    if not st.session_state.webhook_server:
-        st.session_state.webhook_server = WebhookServer()
-        
-        # Set trade callback
-        def webhook_trade_callback(webhook_data):
-            logger.info(f"Webhook callback triggered: {webhook_data}")
-            # Here you would execute the trade
-            # For demo, just log it
-            return {"status": "received", "mode": config.TRADING_MODE}
-        
-        st.session_state.webhook_server.set_trade_callback(webhook_trade_callback)
+    webhook_server = get_webhook_server()
     
     st.markdown("---")
     
@@ -440,19 +578,19 @@ def webhook_page():
     
     with col1:
         if st.button("🚀 Start Webhook Server", use_container_width=True, type="primary"):
-            st.session_state.webhook_server.start()
+            webhook_server.start()
             st.success("Webhook server started!")
     
     with col2:
         if st.button("⏹️ Stop Webhook Server", use_container_width=True):
-            st.session_state.webhook_server.stop()
+            webhook_server.stop()
             st.warning("Webhook server stopped!")
     
     # Webhook URL
     st.markdown("---")
     st.subheader("📡 Webhook URL")
     
-    webhook_url = st.session_state.webhook_server.get_webhook_url()
+    webhook_url = webhook_server.get_webhook_url()
     
     st.code(webhook_url, language="text")
     
@@ -479,7 +617,7 @@ def webhook_page():
     st.markdown("---")
     st.subheader("📝 Sample TradingView Alert Configuration")
     
-    sample_payload = st.session_state.webhook_server.test_webhook()
+    sample_payload = webhook_server.test_webhook()
     
     st.json(sample_payload)
     
@@ -504,21 +642,26 @@ def webhook_page():
     if st.button("🔄 Refresh Logs"):
         st.rerun()
     
-    logs = st.session_state.webhook_server.get_logs(limit=20)
+    logs = _webhook_log_table(webhook_server, webhook_server.get_log_version())
     
-    if logs:
-        logs_df = pd.DataFrame(logs)
-        st.dataframe(logs_df, use_container_width=True)
+    if not logs.empty:
+        st.dataframe(logs, use_container_width=True)
     else:
         st.info("No webhook requests received yet")
 
 
+@st.fragment(run_every="1s")
+def sidebar_clock():
+    """Sidebar clock; reruns on its own without rerunning the page"""
+    st.markdown(f"**Time:** {datetime.now().strftime('%H:%M:%S')}")
+
+
 def main():
     """Main application"""
     
     # Sidebar
     with st.sidebar:
-        st.image("https://upload.wikimedia.org/wikipedia/commons/thumb/2/2f/Google_2015_logo.svg/368px-Google_2015_logo.svg.png", width=100)
+        st.markdown(f'<img src="{LOGO_URL}" width="100">', unsafe_allow_html=True)
         st.markdown("# 📈 Fyers Algo")
         st.markdown("---")
         
@@ -532,9 +675,11 @@ def main():
             st.markdown("---")
             st.markdown("### ℹ️ Info")
             st.markdown(f"**Mode:** {config.TRADING_MODE}")
-            st.markdown(f"**Time:** {datetime.now().strftime('%H:%M:%S')}")
+            sidebar_clock()
             
             if page == "Logout":
+                if st.session_state.fyers_auth:
+                    st.session_state.fyers_auth.logout()
                 st.session_state.authenticated = False
                 st.session_state.fyers_auth = None
                 st.session_state.access_token = None
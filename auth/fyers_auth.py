@@ -2,14 +2,51 @@
 Fyers Authentication Module
 Handles OAuth 2.0 authentication flow for Fyers API
 """
+import json
 import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import date
+from cryptography.fernet import Fernet, InvalidToken
 from fyers_apiv3 import fyersModel
 import webbrowser
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import unquote_plus
 import config
 
 logger = logging.getLogger(__name__)
 
+# auth_code query parameter of the OAuth redirect URL
+_AUTH_CODE_RE = re.compile(r'[?&]auth_code=([^&#]+)')
+
+
+def _open_browser(url):
+    """
+    Open a URL in the default browser without waiting for it to start
+    
+    Args:
+        url: URL to open
+    """
+    if sys.platform == 'win32':
+        os.startfile(url)
+        return
+    
+    command = 'open' if sys.platform == 'darwin' else 'xdg-open'
+    
+    try:
+        subprocess.Popen(
+            [command, url],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except FileNotFoundError:
+        # No launcher on PATH - let webbrowser find a browser, off this thread
+        threading.Thread(target=webbrowser.open, args=(url,), daemon=True).start()
+
 
 class FyersAuth:
     """
@@ -33,23 +70,38 @@ class FyersAuth:
         self.access_token = None
         self.fyers = None
         
+        # OAuth session, shared by the auth-code and token-exchange steps
+        self._session = None
+        
         logger.info("FyersAuth initialized")
     
-    def generate_auth_url(self):
+    def _get_session(self):
         """
-        Generate the authentication URL for user login
+        Get the OAuth session model, creating it on first use
         
         Returns:
-            str: Authentication URL for user to visit
+            fyersModel.SessionModel: Session for this app's credentials
         """
-        try:
-            session = fyersModel.SessionModel(
+        if self._session is None:
+            self._session = fyersModel.SessionModel(
                 client_id=self.client_id,
                 secret_key=self.secret_key,
                 redirect_uri=self.redirect_url,
                 response_type='code',
                 grant_type='authorization_code'
             )
+        
+        return self._session
+    
+    def generate_auth_url(self):
+        """
+        Generate the authentication URL for user login
+        
+        Returns:
+            str: Authentication URL for user to visit
+        """
+        try:
+            session = self._get_session()
             
             auth_url = session.generate_authcode()
             logger.info("Authentication URL generated successfully")
@@ -69,7 +121,7 @@ class FyersAuth:
         auth_url = self.generate_auth_url()
         
         try:
-            webbrowser.open(auth_url)
+            _open_browser(auth_url)
             logger.info("Opened authentication URL in browser")
         except Exception as e:
             logger.warning(f"Could not open browser: {e}")
@@ -87,11 +139,10 @@ class FyersAuth:
             str: Authorization code
         """
         try:
-            parsed_url = urlparse(redirect_response)
-            params = parse_qs(parsed_url.query)
+            match = _AUTH_CODE_RE.search(redirect_response)
             
-            if 'auth_code' in params:
-                auth_code = params['auth_code'][0]
+            if match:
+                auth_code = unquote_plus(match.group(1))
                 logger.info("Authorization code extracted successfully")
                 return auth_code
             else:
@@ -113,13 +164,7 @@ class FyersAuth:
             str: Access token
         """
         try:
-            session = fyersModel.SessionModel(
-                client_id=self.client_id,
-                secret_key=self.secret_key,
-                redirect_uri=self.redirect_url,
-                response_type='code',
-                grant_type='authorization_code'
-            )
+            session = self._get_session()
             
             session.set_token(auth_code)
             response = session.generate_token()
@@ -131,6 +176,12 @@ class FyersAuth:
                 # Initialize Fyers client with access token
                 self.initialize_client()
                 
+                # Persist so an app restart can skip the OAuth flow
+                try:
+                    self.save_token()
+                except Exception as e:
+                    logger.warning(f"Could not save access token: {e}")
+                
                 return self.access_token
             else:
                 logger.error(f"Failed to generate access token: {response}")
@@ -176,6 +227,122 @@ class FyersAuth:
         self.initialize_client()
         logger.info("Access token set manually")
     
+    @staticmethod
+    def _token_cipher(create=False):
+        """
+        Build the cipher used for the saved token file
+        
+        The key lives in its own owner-only file (config.TOKEN_KEY_FILE), so
+        saving and loading use the same key whether the credentials came
+        from .env or from the login form.
+        
+        Args:
+            create: Generate the key file if it does not exist yet
+            
+        Returns:
+            Fernet: Cipher instance, or None if there is no key file
+        """
+        path = config.TOKEN_KEY_FILE
+        
+        try:
+            with open(path, 'rb') as f:
+                return Fernet(f.read().strip())
+        except FileNotFoundError:
+            if not create:
+                return None
+        
+        key = Fernet.generate_key()
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+        os.chmod(path, 0o600)
+        
+        return Fernet(key)
+    
+    def save_token(self, path=None):
+        """
+        Save the access token to an encrypted, owner-only file
+        
+        Args:
+            path: Token file path (optional, defaults to config.TOKEN_FILE)
+        """
+        path = path or config.TOKEN_FILE
+        
+        payload = json.dumps({
+            'client_id': self.client_id,
+            'access_token': self.access_token,
+            'saved_at': time.time()
+        })
+        encrypted = self._token_cipher(create=True).encrypt(payload.encode())
+        
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'token': encrypted.decode()}, f)
+        os.chmod(path, 0o600)
+        
+        logger.info("Access token saved")
+    
+    @classmethod
+    def load_token(cls, client_id=None, secret_key=None, redirect_url=None, path=None):
+        """
+        Restore an authenticated FyersAuth from a token saved today
+        
+        The client ID is restored from the token file, so this works when
+        the login used credentials from the form rather than .env.
+        
+        Args:
+            client_id: Only accept a token saved for this Fyers App ID (optional)
+            secret_key: Fyers App Secret (optional, will use config if not provided)
+            redirect_url: OAuth redirect URL (optional, will use config if not provided)
+            path: Token file path (optional, defaults to config.TOKEN_FILE)
+            
+        Returns:
+            FyersAuth: Authenticated instance, or None if there is no usable token
+        """
+        path = path or config.TOKEN_FILE
+        
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            cipher = cls._token_cipher()
+            if cipher is None:
+                return None
+            
+            with open(path) as f:
+                encrypted = json.load(f)['token']
+            
+            saved = json.loads(cipher.decrypt(encrypted.encode()))
+            
+        except (InvalidToken, ValueError, KeyError, OSError) as e:
+            logger.warning(f"Ignoring unreadable token file: {e!r}")
+            return None
+        
+        # Fyers tokens expire daily
+        if not saved.get('client_id') or (client_id and saved['client_id'] != client_id) or \
+                date.fromtimestamp(saved.get('saved_at', 0)) != date.today():
+            logger.info("Saved access token is stale")
+            return None
+        
+        auth = cls(saved['client_id'], secret_key, redirect_url)
+        auth.set_access_token(saved['access_token'])
+        return auth
+    
+    @staticmethod
+    def clear_token(path=None):
+        """
+        Delete the saved token file
+        
+        Args:
+            path: Token file path (optional, defaults to config.TOKEN_FILE)
+        """
+        path = path or config.TOKEN_FILE
+        
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
     def get_profile(self):
         """
         Get user profile information
@@ -231,6 +398,7 @@ class FyersAuth:
         """
         self.access_token = None
         self.fyers = None
+        self.clear_token()
         logger.info("Logged out successfully")
     
     def validate_credentials(self):
@@ -1,9 +1,12 @@
 """
 Configuration management for Fyers Algo Trading Application
 """
+import atexit
 import os
+import queue
 from dotenv import load_dotenv
 import logging
+from logging.handlers import QueueHandler, QueueListener
 
 # Load environment variables
 load_dotenv()
@@ -13,9 +16,22 @@ FYERS_CLIENT_ID = os.getenv('FYERS_CLIENT_ID', '')
 FYERS_SECRET_KEY = os.getenv('FYERS_SECRET_KEY', '')
 FYERS_REDIRECT_URL = os.getenv('FYERS_REDIRECT_URL', 'http://localhost:8501')
 
+# Encrypted access token cache (lets the app skip OAuth on restart)
+TOKEN_FILE = os.getenv('FYERS_TOKEN_FILE', '.fyers_token.json')
+
+# Owner-only key the token cache is encrypted with, created on first save
+TOKEN_KEY_FILE = os.getenv('FYERS_TOKEN_KEY_FILE', '.fyers_token.key')
+
 # Webhook Configuration
 WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 5000))
 WEBHOOK_TOKEN = os.getenv('WEBHOOK_TOKEN', '')
+WEBHOOK_THREADS = int(os.getenv('WEBHOOK_THREADS', 8))
+
+# Threads running webhook trade callbacks; with one, alerts execute in arrival order
+WEBHOOK_CALLBACK_WORKERS = int(os.getenv('WEBHOOK_CALLBACK_WORKERS', 1))
+
+# Webhook alerts kept in memory (oldest dropped first)
+MAX_WEBHOOK_LOGS = 1000
 
 # Strategy Default Parameters
 DEFAULT_FAST_EMA = int(os.getenv('DEFAULT_FAST_EMA', 9))
@@ -29,24 +45,49 @@ DEFAULT_TARGET_PCT = float(os.getenv('DEFAULT_TARGET_PCT', 4.0))
 # Trading Mode
 TRADING_MODE = os.getenv('TRADING_MODE', 'PAPER')
 
+# Run async API calls on uvloop when it is installed (Linux/macOS)
+USE_UVLOOP = os.getenv('USE_UVLOOP', 'false').lower() == 'true'
+
+# Threads per batch indicator call (0 = one per core); lower it so batches
+# sharing the machine with the webhook server don't oversubscribe it
+INDICATOR_THREADS = int(os.getenv('INDICATOR_THREADS', 0))
+
 # Fyers API Constants
 FYERS_BASE_URL = "https://api-t1.fyers.in/api/v3"
+FYERS_DATA_URL = "https://api-t1.fyers.in/data"
 FYERS_AUTH_URL = "https://api-t2.fyers.in/vagator/v2"
 
 # Logging Configuration
 LOG_LEVEL = logging.INFO
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
+_log_listener = None
+
 def setup_logging():
-    """Setup logging configuration"""
-    logging.basicConfig(
-        level=LOG_LEVEL,
-        format=LOG_FORMAT,
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('trading_app.log')
-        ]
-    )
+    """
+    Setup logging configuration
+    
+    Records are put on an in-memory queue and written to the console and
+    log file by a background QueueListener, so logging calls from the
+    strategy loop never block on disk I/O. Safe to call on every rerun.
+    """
+    global _log_listener
+    
+    if _log_listener is None:
+        log_queue = queue.SimpleQueue()
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [logging.StreamHandler(), logging.FileHandler('trading_app.log')]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+        
+        root = logging.getLogger()
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(QueueHandler(log_queue))
+    
     return logging.getLogger(__name__)
 
 # Market Data Configuration
@@ -81,3 +122,18 @@ PRODUCT_CNC = "CNC"
 # Validity
 VALIDITY_DAY = "DAY"
 VALIDITY_IOC = "IOC"
+
+# Maximum orders per Fyers basket (multi-order) request
+MAX_BASKET_ORDERS = 10
+
+# Maximum symbols per Fyers quotes request
+MAX_QUOTE_SYMBOLS = 50
+
+# Maximum symbols on the Fyers data WebSocket
+MAX_STREAM_SYMBOLS = 5000
+
+# Price levels per side kept by the depth stream (the socket sends up to 50)
+DEPTH_STREAM_LEVELS = 5
+
+# Trades/signals kept in memory per strategy (oldest dropped first)
+MAX_STRATEGY_HISTORY = int(os.getenv('MAX_STRATEGY_HISTORY', 10000))
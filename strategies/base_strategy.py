@@ -3,8 +3,15 @@ Base Strategy Class
 Abstract base class for all trading strategies
 """
 from abc import ABC, abstractmethod
+import asyncio
+from collections import deque
+from itertools import islice
 import logging
 from datetime import datetime
+import config
+from api.async_http import run_coroutine
+from api.fast_json import dumps
+from utils.helpers import to_paise
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +21,10 @@ class BaseStrategy(ABC):
     Abstract base class for trading strategies
     """
     
+    # Fixed attribute layout; subclasses list their own fields in __slots__
+    __slots__ = ('name', 'fyers_client', 'market_data', 'config',
+                 'is_running', 'positions', 'signals', 'trade_log')
+    
     def __init__(self, name, fyers_client, market_data, config_params=None):
         """
         Initialize base strategy
@@ -23,6 +34,7 @@ class BaseStrategy(ABC):
             fyers_client: FyersClient instance
             market_data: MarketData instance
             config_params: Dictionary of configuration parameters
+                           ('history_limit' caps the stored trades/signals)
         """
         self.name = name
         self.fyers_client = fyers_client
@@ -31,16 +43,22 @@ class BaseStrategy(ABC):
         
         self.is_running = False
         self.positions = []
-        self.signals = []
-        self.trade_log = []
         
-        logger.info(f"Strategy '{name}' initialized")
+        # Bounded so a long-running strategy doesn't grow without limit
+        history_limit = self.config.get('history_limit', config.MAX_STRATEGY_HISTORY)
+        self.signals = deque(maxlen=history_limit)
+        self.trade_log = deque(maxlen=history_limit)
+        
+        logger.info("Strategy '%s' initialized", name)
     
     @abstractmethod
-    def generate_signal(self):
+    def generate_signal(self, now=None):
         """
         Generate trading signal
         
+        Args:
+            now: Time of this strategy iteration (default: datetime.now())
+            
         Returns:
             dict: Signal with 'action' (BUY/SELL/HOLD), 'symbol', 'quantity', etc.
         """
@@ -64,14 +82,14 @@ class BaseStrategy(ABC):
         Start the strategy
         """
         self.is_running = True
-        logger.info(f"Strategy '{self.name}' started")
+        logger.info("Strategy '%s' started", self.name)
     
     def stop(self):
         """
         Stop the strategy
         """
         self.is_running = False
-        logger.info(f"Strategy '{self.name}' stopped")
+        logger.info("Strategy '%s' stopped", self.name)
     
     def get_status(self):
         """
@@ -88,27 +106,31 @@ class BaseStrategy(ABC):
             'config': self.config
         }
     
-    def log_trade(self, trade_info):
+    def log_trade(self, trade_info, timestamp=None):
         """
         Log a trade execution
         
         Args:
             trade_info: Dictionary with trade details
+            timestamp: Time to record (default: datetime.now())
         """
-        trade_info['timestamp'] = datetime.now()
+        trade_info['timestamp'] = timestamp or datetime.now()
         self.trade_log.append(trade_info)
-        logger.info(f"Trade logged: {trade_info}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Trade logged: %s", dumps(trade_info, default=str).decode())
     
-    def add_signal(self, signal):
+    def add_signal(self, signal, timestamp=None):
         """
         Add a signal to history
         
         Args:
             signal: Signal dictionary
+            timestamp: Time to record (default: datetime.now())
         """
-        signal['timestamp'] = datetime.now()
+        signal['timestamp'] = timestamp or datetime.now()
         self.signals.append(signal)
-        logger.info(f"Signal added: {signal}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Signal added: %s", dumps(signal, default=str).decode())
     
     def calculate_position_size(self, capital, price, risk_per_trade=0.02):
         """
@@ -120,10 +142,15 @@ class BaseStrategy(ABC):
             risk_per_trade: Risk percentage per trade (default: 2%)
             
         Returns:
-            int: Position size
+            int: Position size (0 if the price is not positive)
         """
-        risk_amount = capital * risk_per_trade
-        position_size = int(risk_amount / price)
+        price_paise = to_paise(price)
+        if price_paise <= 0:
+            return 0
+        
+        # Integer paise and basis points, so float rounding can't shave off a unit
+        risk_bps = round(risk_per_trade * 10000)
+        position_size = (to_paise(capital) * risk_bps) // (price_paise * 10000)
         
         return max(1, position_size)
     
@@ -139,10 +166,9 @@ class BaseStrategy(ABC):
         Returns:
             float: Stop loss price
         """
-        if side == 1:  # Long position
-            return entry_price * (1 - stop_loss_pct / 100)
-        else:  # Short position
-            return entry_price * (1 + stop_loss_pct / 100)
+        # Below entry for longs (side 1), above for shorts (side -1); also
+        # works element-wise on NumPy arrays of prices and sides
+        return entry_price * (1 - side * stop_loss_pct / 100)
     
     def calculate_target(self, entry_price, side, target_pct=4.0):
         """
@@ -156,10 +182,8 @@ class BaseStrategy(ABC):
         Returns:
             float: Target price
         """
-        if side == 1:  # Long position
-            return entry_price * (1 + target_pct / 100)
-        else:  # Short position
-            return entry_price * (1 - target_pct / 100)
+        # Above entry for longs (side 1), below for shorts (side -1)
+        return entry_price * (1 + side * target_pct / 100)
     
     def update_positions(self):
         """
@@ -170,12 +194,12 @@ class BaseStrategy(ABC):
             
             if positions_response and positions_response.get('s') == 'ok':
                 self.positions = positions_response.get('netPositions', [])
-                logger.info(f"Positions updated: {len(self.positions)} active")
+                logger.info("Positions updated: %d active", len(self.positions))
             else:
-                logger.error(f"Failed to update positions: {positions_response}")
+                logger.error("Failed to update positions: %s", positions_response)
                 
         except Exception as e:
-            logger.error(f"Error updating positions: {e}")
+            logger.error("Error updating positions: %s", e)
     
     def close_all_positions(self):
         """
@@ -184,42 +208,65 @@ class BaseStrategy(ABC):
         Returns:
             list: List of close order responses
         """
-        results = []
-        
         try:
-            self.update_positions()
-            
-            for position in self.positions:
-                # Extract position details
-                symbol = position.get('symbol')
-                quantity = abs(int(position.get('netQty', 0)))
-                side = -1 if int(position.get('netQty', 0)) > 0 else 1  # Opposite side to close
-                
-                if quantity > 0:
-                    # Place market order to close
-                    result = self.fyers_client.place_order(
-                        symbol=symbol,
-                        side=side,
-                        quantity=quantity,
-                        order_type='MARKET'
-                    )
-                    
-                    results.append(result)
-                    
-                    self.log_trade({
-                        'action': 'CLOSE',
-                        'symbol': symbol,
-                        'quantity': quantity,
-                        'result': result
-                    })
-            
-            logger.info(f"Closed {len(results)} positions")
-            return results
+            return run_coroutine(self._close_all_positions_and_release())
             
         except Exception as e:
-            logger.error(f"Error closing positions: {e}")
+            logger.error("Error closing positions: %s", e)
             return []
     
+    async def _close_all_positions_and_release(self):
+        """
+        Run close_all_positions_async() and release the pooled HTTP session
+        
+        The session is bound to the event loop run_coroutine() creates, so it
+        has to be closed before that loop goes away.
+        """
+        try:
+            return await self.close_all_positions_async()
+        finally:
+            await self.fyers_client.http.close()
+    
+    async def close_all_positions_async(self):
+        """
+        Close all open positions with concurrent market orders
+        
+        Returns:
+            list: List of close order responses
+        """
+        self.update_positions()
+        
+        closes = []
+        for position in self.positions:
+            # Extract position details
+            net_qty = int(position.get('netQty', 0))
+            if net_qty != 0:
+                # Opposite side to close
+                closes.append((position.get('symbol'), abs(net_qty), -1 if net_qty > 0 else 1))
+        
+        # Place market orders to close, all in flight at once
+        results = await asyncio.gather(*[
+            self.fyers_client.place_order_async(
+                symbol=symbol,
+                side=side,
+                quantity=quantity,
+                order_type='MARKET'
+            )
+            for symbol, quantity, side in closes
+        ])
+        
+        now = datetime.now()
+        for (symbol, quantity, _), result in zip(closes, results):
+            self.log_trade({
+                'action': 'CLOSE',
+                'symbol': symbol,
+                'quantity': quantity,
+                'result': result
+            }, timestamp=now)
+        
+        logger.info("Closed %d positions", len(results))
+        return results
+    
     def get_trade_history(self, limit=None):
         """
         Get trade history
@@ -230,9 +277,7 @@ class BaseStrategy(ABC):
         Returns:
             list: Trade history
         """
-        if limit:
-            return self.trade_log[-limit:]
-        return self.trade_log
+        return self._tail(self.trade_log, limit)
     
     def get_signal_history(self, limit=None):
         """
@@ -244,9 +289,23 @@ class BaseStrategy(ABC):
         Returns:
             list: Signal history
         """
+        return self._tail(self.signals, limit)
+    
+    @staticmethod
+    def _tail(history, limit):
+        """
+        Copy the newest entries of a history deque into a list
+        
+        Args:
+            history: trade_log or signals
+            limit: Maximum number of entries (None for all)
+            
+        Returns:
+            list: Entries, oldest first
+        """
         if limit:
-            return self.signals[-limit:]
-        return self.signals
+            return list(islice(history, max(0, len(history) - limit), None))
+        return list(history)
     
     def reset(self):
         """
@@ -254,6 +313,6 @@ class BaseStrategy(ABC):
         """
         self.is_running = False
         self.positions = []
-        self.signals = []
-        self.trade_log = []
-        logger.info(f"Strategy '{self.name}' reset")
+        self.signals.clear()
+        self.trade_log.clear()
+        logger.info("Strategy '%s' reset", self.name)
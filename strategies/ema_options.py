@@ -3,8 +3,11 @@ EMA-based Options Trading Strategy
 Demonstration strategy using EMA crossover for options trading
 """
 import logging
+from datetime import datetime
+import numpy as np
 from strategies.base_strategy import BaseStrategy
-from utils.indicators import calculate_ema, detect_crossover
+from utils.indicators import crossover_signal
+from utils.ema_kernel import ema_fold, ema_seed, warm_up
 from utils.helpers import format_symbol
 import config
 
@@ -22,6 +25,11 @@ class EMAOptionsStrategy(BaseStrategy):
     - Exit on opposite crossover or target/stop-loss hit
     """
     
+    __slots__ = ('underlying_symbol', 'fast_ema_period', 'slow_ema_period', 'timeframe',
+                 'position_size', 'stop_loss_pct', 'target_pct',
+                 'current_position', 'last_signal',
+                 '_fast_alpha', '_slow_alpha', '_ema_bar', '_fast_ema_value', '_slow_ema_value')
+    
     def __init__(self, fyers_client, market_data, config_params=None):
         """
         Initialize EMA Options Strategy
@@ -46,44 +54,56 @@ class EMAOptionsStrategy(BaseStrategy):
         self.current_position = None
         self.last_signal = None
         
-        logger.info(f"EMA Strategy initialized with Fast: {self.fast_ema_period}, Slow: {self.slow_ema_period}")
+        # EMA smoothing factors and incremental EMA state (see _update_emas)
+        self._fast_alpha = 2 / (self.fast_ema_period + 1)
+        self._slow_alpha = 2 / (self.slow_ema_period + 1)
+        self._reset_ema_state()
+        
+        logger.info("EMA Strategy initialized with Fast: %s, Slow: %s", self.fast_ema_period, self.slow_ema_period)
     
-    def generate_signal(self):
+    def generate_signal(self, now=None):
         """
         Generate trading signal based on EMA crossover
         
+        Args:
+            now: Time of this strategy iteration (default: datetime.now())
+            
         Returns:
             dict: Signal with action, symbol, quantity, etc.
         """
+        underlying = self.underlying_symbol
+        fast_period = self.fast_ema_period
+        slow_period = self.slow_ema_period
+        
         try:
-            # Fetch historical data for underlying
-            df = self.market_data.get_historical_data(
-                symbol=self.underlying_symbol,
+            # Fetch historical closes for underlying
+            series = self.market_data.get_close_series(
+                symbol=underlying,
                 days=10,  # Enough data for EMA calculation
                 timeframe=self.timeframe
             )
             
-            if df is None or len(df) < self.slow_ema_period + 5:
+            if series is None or len(series[1]) < slow_period + 5:
                 logger.warning("Insufficient data for EMA calculation")
                 return {'action': 'HOLD', 'reason': 'Insufficient data'}
             
             # Calculate EMAs
-            fast_ema = calculate_ema(df, self.fast_ema_period)
-            slow_ema = calculate_ema(df, self.slow_ema_period)
+            stamps, closes = series
+            fast_prev, slow_prev, fast_ema, slow_ema = self._update_emas(stamps, closes)
             
             # Detect crossover
-            signal_type, crossover = detect_crossover(fast_ema, slow_ema)
+            signal_type, crossover = crossover_signal(fast_prev, slow_prev, fast_ema, slow_ema)
             
             # Get current price
-            current_price = df['close'].iloc[-1]
+            current_price = float(closes[-1])
             
             # Generate signal
             signal = {
-                'timestamp': df.index[-1],
-                'underlying': self.underlying_symbol,
+                'timestamp': datetime.fromtimestamp(stamps[-1]),
+                'underlying': underlying,
                 'current_price': current_price,
-                'fast_ema': fast_ema.iloc[-1],
-                'slow_ema': slow_ema.iloc[-1],
+                'fast_ema': fast_ema,
+                'slow_ema': slow_ema,
                 'signal_type': signal_type,
                 'crossover': crossover
             }
@@ -115,16 +135,82 @@ class EMAOptionsStrategy(BaseStrategy):
                     signal['reason'] = 'No crossover detected'
             
             # Add signal to history
-            self.add_signal(signal)
+            self.add_signal(signal, timestamp=now)
             self.last_signal = signal
             
-            logger.info(f"Signal generated: {signal['action']} - {signal.get('reason')}")
+            logger.info("Signal generated: %s - %s", signal['action'], signal.get('reason'))
             return signal
             
         except Exception as e:
-            logger.error(f"Error generating signal: {e}")
+            logger.error("Error generating signal: %s", e)
             return {'action': 'HOLD', 'reason': f'Error: {str(e)}'}
     
+    def _reset_ema_state(self):
+        """
+        Forget the incremental EMA state; the next signal recomputes from history
+        """
+        self._ema_bar = None
+        self._fast_ema_value = None
+        self._slow_ema_value = None
+    
+    def _update_emas(self, stamps, closes):
+        """
+        Bring the EMAs up to date with the latest candles
+        
+        EMA state is kept through the second-to-last candle, since the
+        last one is still forming and its close changes between calls.
+        Each call folds in only the candles completed since the previous
+        call, then applies the forming candle on top, instead of
+        recomputing both EMAs over the whole window. The state is rebuilt
+        from the full window on the first call or if the stored candle is
+        no longer in the history.
+        
+        Args:
+            stamps: Candle timestamps, ascending
+            closes: float64 candle closes
+            
+        Returns:
+            tuple: (fast_prev, slow_prev, fast_current, slow_current) -
+                   EMAs at the last completed candle and at the forming one
+        """
+        fast_alpha = self._fast_alpha
+        slow_alpha = self._slow_alpha
+        
+        start = int(np.searchsorted(stamps, self._ema_bar)) + 1 if self._ema_bar is not None else 0
+        
+        if start == 0 or start >= len(stamps) or stamps[start - 1] != self._ema_bar:
+            # Cold start: full-window EMAs through the last completed candle
+            fast, slow = ema_seed(closes[:-1], fast_alpha, slow_alpha)
+        else:
+            fast, slow = ema_fold(closes[start:-1], fast_alpha, slow_alpha,
+                                  self._fast_ema_value, self._slow_ema_value)
+        
+        self._ema_bar = stamps[-2]
+        self._fast_ema_value = fast
+        self._slow_ema_value = slow
+        
+        last_close = closes[-1]
+        return (
+            fast,
+            slow,
+            fast + fast_alpha * (last_close - fast),
+            slow + slow_alpha * (last_close - slow)
+        )
+    
+    def start(self):
+        """
+        Start the strategy, compiling the EMA kernel first so the first tick doesn't pay for it
+        """
+        warm_up()
+        super().start()
+    
+    def reset(self):
+        """
+        Reset strategy state
+        """
+        super().reset()
+        self._reset_ema_state()
+    
     def execute_signal(self, signal):
         """
         Execute a trading signal
@@ -148,11 +234,11 @@ class EMAOptionsStrategy(BaseStrategy):
                 return self._execute_exit(signal)
             
             else:
-                logger.warning(f"Unknown action: {action}")
+                logger.warning("Unknown action: %s", action)
                 return {'status': 'error', 'message': f'Unknown action: {action}'}
                 
         except Exception as e:
-            logger.error(f"Error executing signal: {e}")
+            logger.error("Error executing signal: %s", e)
             return {'status': 'error', 'message': str(e)}
     
     def _execute_entry(self, signal):
@@ -165,11 +251,6 @@ class EMAOptionsStrategy(BaseStrategy):
         Returns:
             dict: Execution result
         """
-        # Close existing position if any
-        if self.current_position:
-            logger.info("Closing existing position before new entry")
-            self._execute_exit(signal)
-        
         # For demonstration, we'll use a simplified approach
         # In production, you'd need to:
         # 1. Find the appropriate strike price (ATM/OTM)
@@ -186,6 +267,8 @@ class EMAOptionsStrategy(BaseStrategy):
         
         # Create a demo position entry
         entry_info = {
+            'type': 'ENTRY',
+            'mode': config.TRADING_MODE,
             'symbol': f"{self.underlying_symbol}-{option_type}",
             'option_type': option_type,
             'entry_price': signal.get('current_price', 0),
@@ -198,13 +281,14 @@ class EMAOptionsStrategy(BaseStrategy):
         
         # In paper trading or demo mode
         if config.TRADING_MODE == 'PAPER':
-            logger.info(f"PAPER TRADE - Entry: {entry_info}")
+            # Close existing position if any, as one reversal
+            if self.current_position:
+                logger.info("Closing existing position before new entry")
+                return self._reverse_position(signal, entry_info)
+            
+            logger.info("PAPER TRADE - Entry: %s", entry_info)
             self.current_position = entry_info
-            self.log_trade({
-                'type': 'ENTRY',
-                'mode': 'PAPER',
-                **entry_info
-            })
+            self.log_trade(entry_info, timestamp=signal.get('timestamp'))
             return {'status': 'success', 'message': 'Paper trade executed', 'position': entry_info}
         
         # For live trading, place actual order
@@ -226,6 +310,30 @@ class EMAOptionsStrategy(BaseStrategy):
         if not self.current_position:
             return {'status': 'success', 'message': 'No position to exit'}
         
+        exit_info = self._build_exit_info(signal)
+        
+        # In paper trading mode
+        if config.TRADING_MODE == 'PAPER':
+            logger.info("PAPER TRADE - Exit: %s", exit_info)
+            self.log_trade(exit_info, timestamp=signal.get('timestamp'))
+            self.current_position = None
+            return {'status': 'success', 'message': 'Paper trade exit executed', 'exit': exit_info}
+        
+        # For live trading
+        else:
+            logger.error("Live trading exit requires actual order placement")
+            return {'status': 'error', 'message': 'Live trading not implemented in demo'}
+    
+    def _build_exit_info(self, signal):
+        """
+        Build the exit record for the current position
+        
+        Args:
+            signal: Signal dictionary
+            
+        Returns:
+            dict: Exit details with P&L
+        """
         # Calculate P&L
         entry_price = self.current_position.get('entry_price', 0)
         current_price = signal.get('current_price', entry_price)
@@ -234,7 +342,9 @@ class EMAOptionsStrategy(BaseStrategy):
         pnl = (current_price - entry_price) * quantity
         pnl_pct = ((current_price - entry_price) / entry_price * 100) if entry_price != 0 else 0
         
-        exit_info = {
+        return {
+            'type': 'EXIT',
+            'mode': config.TRADING_MODE,
             'symbol': self.current_position['symbol'],
             'exit_price': current_price,
             'exit_time': signal.get('timestamp'),
@@ -244,22 +354,39 @@ class EMAOptionsStrategy(BaseStrategy):
             'pnl_pct': pnl_pct,
             'reason': signal.get('reason', 'Exit signal')
         }
+    
+    def _reverse_position(self, signal, entry_info):
+        """
+        Close the current paper position and open a new one in its place
         
-        # In paper trading mode
-        if config.TRADING_MODE == 'PAPER':
-            logger.info(f"PAPER TRADE - Exit: {exit_info}")
-            self.log_trade({
-                'type': 'EXIT',
-                'mode': 'PAPER',
-                **exit_info
-            })
-            self.current_position = None
-            return {'status': 'success', 'message': 'Paper trade exit executed', 'exit': exit_info}
+        Exit and entry are written as a single REVERSAL trade record. It
+        carries the exit's fields (exit price, P&L, ...) at the top level,
+        like an EXIT record, so trade tables and P&L totals include it; the
+        new position is nested under 'entry'.
         
-        # For live trading
-        else:
-            logger.error("Live trading exit requires actual order placement")
-            return {'status': 'error', 'message': 'Live trading not implemented in demo'}
+        Args:
+            signal: Signal dictionary
+            entry_info: Entry details for the new position
+            
+        Returns:
+            dict: Execution result
+        """
+        exit_info = self._build_exit_info(signal)
+        logger.info("PAPER TRADE - Reversal: %s -> %s", exit_info, entry_info)
+        
+        self.current_position = entry_info
+        self.log_trade({
+            **exit_info,
+            'type': 'REVERSAL',
+            'entry': entry_info
+        }, timestamp=signal.get('timestamp'))
+        
+        return {
+            'status': 'success',
+            'message': 'Paper trade reversed',
+            'exit': exit_info,
+            'position': entry_info
+        }
     
     def _should_exit_position(self, current_signal_type):
         """
@@ -297,8 +424,11 @@ class EMAOptionsStrategy(BaseStrategy):
             return {'status': 'stopped', 'message': 'Strategy not running'}
         
         try:
+            # One clock read per iteration, shared by the signal and trade logs
+            now = datetime.now()
+            
             # Generate signal
-            signal = self.generate_signal()
+            signal = self.generate_signal(now=now)
             
             # Execute signal
             execution = self.execute_signal(signal)
@@ -310,5 +440,5 @@ class EMAOptionsStrategy(BaseStrategy):
             }
             
         except Exception as e:
-            logger.error(f"Error in strategy iteration: {e}")
+            logger.error("Error in strategy iteration: %s", e)
             return {'status': 'error', 'message': str(e)}
@@ -1,5 +1,4 @@
 """Utility functions and helpers"""
-from .indicators import calculate_ema, detect_crossover
 from .helpers import format_symbol, validate_symbol, get_timestamp
 
 __all__ = [
@@ -9,3 +8,11 @@ __all__ = [
     'validate_symbol',
     'get_timestamp'
 ]
+
+
+def __getattr__(name):
+    # indicators pulls in pandas, so load it on first use
+    if name in ('calculate_ema', 'detect_crossover'):
+        from . import indicators
+        return getattr(indicators, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
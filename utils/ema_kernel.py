@@ -0,0 +1,54 @@
+"""
+EMA Kernel
+Numba-compiled EMA updates for the strategy signal path
+"""
+import numpy as np
+from utils.jit import njit
+
+
+@njit(cache=True, nogil=True)
+def ema_fold(closes, fast_alpha, slow_alpha, fast, slow):
+    """
+    Advance a fast and a slow EMA over a run of closes in one pass
+
+    Matches pandas ewm(adjust=False): each close moves the EMA by
+    alpha * (close - ema).
+
+    Args:
+        closes: float64 array of closes, oldest first
+        fast_alpha: Fast EMA smoothing factor, 2 / (period + 1)
+        slow_alpha: Slow EMA smoothing factor, 2 / (period + 1)
+        fast: Fast EMA before the first close
+        slow: Slow EMA before the first close
+
+    Returns:
+        tuple: (fast, slow) after the last close
+    """
+    for i in range(closes.shape[0]):
+        close = closes[i]
+        fast += fast_alpha * (close - fast)
+        slow += slow_alpha * (close - slow)
+    return fast, slow
+
+
+def ema_seed(closes, fast_alpha, slow_alpha):
+    """
+    Full-window fast/slow EMAs, seeded with the first close like pandas ewm
+
+    Args:
+        closes: float64 array of closes, oldest first (at least one)
+        fast_alpha: Fast EMA smoothing factor
+        slow_alpha: Slow EMA smoothing factor
+
+    Returns:
+        tuple: (fast, slow) after the last close
+    """
+    first = closes[0]
+    return ema_fold(closes[1:], fast_alpha, slow_alpha, first, first)
+
+
+def warm_up():
+    """
+    Compile (or load from the on-disk cache) the kernels ahead of the first tick
+    """
+    ema_seed(np.ones(3), 0.5, 0.25)
@@ -2,15 +2,34 @@
 Helper Utility Functions
 """
 import re
-from datetime import datetime, timedelta
+import time
+import functools
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Fyers symbol format: EXCHANGE:SYMBOL-SEGMENT
+_match_symbol = re.compile(r'[A-Z]+:[A-Z0-9]+-[A-Z]+').fullmatch
 
+# Common index symbols
+_INDEX_MAP = {
+    'NIFTY': 'NSE:NIFTY50-INDEX',
+    'NIFTY50': 'NSE:NIFTY50-INDEX',
+    'BANKNIFTY': 'NSE:NIFTYBANK-INDEX',
+    'NIFTYBANK': 'NSE:NIFTYBANK-INDEX',
+    'FINNIFTY': 'NSE:FINNIFTY-INDEX',
+}
+
+# EXCHANGE:UNDERLYING + EXPIRY + STRIKE + CE/PE, e.g. NSE:NIFTY24DEC24000CE
+_OPTION_SYMBOL_RE = re.compile(r'([^:]*):([A-Z]+)(\d{2}[A-Z]{3})(\d+)(CE|PE)[^:]*')
+
+
+@functools.lru_cache(maxsize=2048)
 def format_symbol(symbol):
     """
-    Format a symbol string for Fyers API
+    Format a symbol string for Fyers API (cached, the same few symbols recur)
     
     Args:
         symbol: Symbol string (e.g., "NIFTY", "BANKNIFTY", "SBIN")
@@ -24,25 +43,14 @@ def format_symbol(symbol):
     if ':' in symbol:
         return symbol
     
-    # Common index symbols
-    index_map = {
-        'NIFTY': 'NSE:NIFTY50-INDEX',
-        'NIFTY50': 'NSE:NIFTY50-INDEX',
-        'BANKNIFTY': 'NSE:NIFTYBANK-INDEX',
-        'NIFTYBANK': 'NSE:NIFTYBANK-INDEX',
-        'FINNIFTY': 'NSE:FINNIFTY-INDEX',
-    }
-    
-    if symbol in index_map:
-        return index_map[symbol]
-    
-    # Default to NSE equity
-    return f"NSE:{symbol}-EQ"
+    # Known index, else default to NSE equity
+    return _INDEX_MAP.get(symbol) or f"NSE:{symbol}-EQ"
 
 
+@functools.lru_cache(maxsize=2048)
 def validate_symbol(symbol):
     """
-    Validate if a symbol string is properly formatted
+    Validate if a symbol string is properly formatted (cached)
     
     Args:
         symbol: Symbol string
@@ -53,9 +61,10 @@ def validate_symbol(symbol):
     if not symbol:
         return False
     
-    # Fyers symbol format: EXCHANGE:SYMBOL-SEGMENT
-    pattern = r'^[A-Z]+:[A-Z0-9]+-[A-Z]+$'
-    return bool(re.match(pattern, symbol))
+    return _match_symbol(symbol) is not None
+
+
+_SECONDS_PER_DAY = 86400
 
 
 def get_timestamp(days_ago=0):
@@ -68,8 +77,7 @@ def get_timestamp(days_ago=0):
     Returns:
         Unix timestamp (seconds)
     """
-    target_date = datetime.now() - timedelta(days=days_ago)
-    return int(target_date.timestamp())
+    return int(time.time()) - days_ago * _SECONDS_PER_DAY
 
 
 def get_date_range(days=30):
@@ -82,46 +90,69 @@ def get_date_range(days=30):
     Returns:
         tuple: (from_timestamp, to_timestamp)
     """
-    to_date = datetime.now()
-    from_date = to_date - timedelta(days=days)
+    to_timestamp = int(time.time())
     
-    return int(from_date.timestamp()), int(to_date.timestamp())
+    return to_timestamp - days * _SECONDS_PER_DAY, to_timestamp
+
+
+@functools.lru_cache(maxsize=16)
+def _date_range_strings(days, today):
+    """
+    Build the (from, to) date strings for a given day (cached)
+    """
+    from_date = today - timedelta(days=days)
+    return from_date.strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')
+
+
+def get_date_range_strings(days=30):
+    """
+    Get date range as 'YYYY-MM-DD' strings for history requests
+    
+    The strings only change once a day, so they are computed once per
+    (days, today) and reused.
+    
+    Args:
+        days: Number of days of historical data
+        
+    Returns:
+        tuple: (from_date_str, to_date_str)
+    """
+    return _date_range_strings(days, date.today())
+
+
+class OptionSymbol(NamedTuple):
+    """
+    Components of an option symbol, as parsed by parse_option_symbol()
+    """
+    exchange: str
+    underlying: str
+    expiry: str
+    strike: int
+    option_type: str
 
 
+@functools.lru_cache(maxsize=2048)
 def parse_option_symbol(symbol):
     """
-    Parse an option symbol to extract components
+    Parse an option symbol to extract components (cached)
     
     Args:
         symbol: Option symbol (e.g., "NSE:NIFTY24DEC24000CE")
         
     Returns:
-        dict with 'exchange', 'underlying', 'expiry', 'strike', 'option_type'
+        OptionSymbol (exchange, underlying, expiry, strike, option_type),
+        or None if the symbol is not an option symbol
     """
     try:
-        # Split exchange and rest
-        parts = symbol.split(':')
-        if len(parts) != 2:
-            return None
-        
-        exchange = parts[0]
-        option_part = parts[1]
-        
-        # Pattern for option symbol: UNDERLYING + EXPIRY + STRIKE + CE/PE
-        # Example: NIFTY24DEC24000CE
-        pattern = r'([A-Z]+)(\d{2}[A-Z]{3})(\d+)(CE|PE)'
-        match = re.match(pattern, option_part)
+        # Exchange and option fields in one pass
+        match = _OPTION_SYMBOL_RE.fullmatch(symbol)
         
         if not match:
             return None
         
-        return {
-            'exchange': exchange,
-            'underlying': match.group(1),
-            'expiry': match.group(2),
-            'strike': int(match.group(3)),
-            'option_type': match.group(4)
-        }
+        exchange, underlying, expiry, strike, option_type = match.groups()
+        
+        return OptionSymbol(exchange, underlying, expiry, int(strike), option_type)
     except Exception as e:
         logger.error(f"Error parsing option symbol {symbol}: {e}")
         return None
@@ -167,6 +198,19 @@ def format_pnl(pnl):
         return str(pnl)
 
 
+def to_paise(amount):
+    """
+    Convert a rupee amount to integer paise
+    
+    Args:
+        amount: Amount in rupees
+        
+    Returns:
+        int: Amount in paise, rounded to the nearest paisa
+    """
+    return round(amount * 100)
+
+
 def calculate_quantity_from_capital(capital, price, lot_size=1):
     """
     Calculate quantity based on available capital
@@ -179,15 +223,21 @@ def calculate_quantity_from_capital(capital, price, lot_size=1):
     Returns:
         Quantity to trade (in lots)
     """
-    if price <= 0:
+    price_paise = to_paise(price)
+    if price_paise <= 0:
         return 0
     
-    max_quantity = int(capital / price)
-    lots = max_quantity // lot_size
+    # Integer paise so e.g. 0.58 / 0.01 doesn't truncate to 57
+    lots = to_paise(capital) // price_paise // lot_size
     
     return lots * lot_size
 
 
+# Market hours: 9:15 AM to 3:30 PM IST, as seconds since midnight
+_MARKET_OPEN_SEC = 9 * 3600 + 15 * 60
+_MARKET_CLOSE_SEC = 15 * 3600 + 30 * 60
+
+
 def is_market_open():
     """
     Check if market is currently open (simple version)
@@ -196,16 +246,24 @@ def is_market_open():
         bool: True if market should be open
     """
     now = datetime.now()
+    seconds = now.hour * 3600 + now.minute * 60 + now.second
     
-    # Market closed on weekends
-    if now.weekday() >= 5:  # Saturday = 5, Sunday = 6
-        return False
+    # Market closed on weekends (Saturday = 5, Sunday = 6)
+    return now.weekday() < 5 and _MARKET_OPEN_SEC <= seconds <= _MARKET_CLOSE_SEC
+
+
+@functools.lru_cache(maxsize=4)
+def _next_expiry_after(today_ordinal):
+    """
+    Next weekly expiry after the given proleptic Gregorian ordinal (cached per day)
+    """
+    weekday = (today_ordinal - 1) % 7  # Ordinal 1 (0001-01-01) was a Monday
+    days_ahead = 3 - weekday  # Thursday = 3
     
-    # Market hours: 9:15 AM to 3:30 PM IST
-    market_open = now.replace(hour=9, minute=15, second=0, microsecond=0)
-    market_close = now.replace(hour=15, minute=30, second=0, microsecond=0)
+    if days_ahead <= 0:  # Target day already happened this week
+        days_ahead += 7
     
-    return market_open <= now <= market_close
+    return datetime.fromordinal(today_ordinal + days_ahead)
 
 
 def get_next_expiry_date():
@@ -213,16 +271,9 @@ def get_next_expiry_date():
     Get next weekly option expiry date (Thursday)
     
     Returns:
-        datetime object for next expiry
+        datetime object for next expiry (at midnight)
     """
-    today = datetime.now()
-    days_ahead = 3 - today.weekday()  # Thursday = 3
-    
-    if days_ahead <= 0:  # Target day already happened this week
-        days_ahead += 7
-    
-    next_expiry = today + timedelta(days=days_ahead)
-    return next_expiry
+    return _next_expiry_after(date.today().toordinal())
 
 
 def truncate_string(text, max_length=50):
@@ -2,8 +2,426 @@
 Technical Indicators Module
 Calculate various technical indicators for trading strategies
 """
+import math
+from collections import deque
 import pandas as pd
 import numpy as np
+import config
+from utils.jit import array_signatures, njit, prange, set_parallel_threads, types
+
+# Price dtypes the kernels work on directly; anything else is converted
+# to float64. float32 input (e.g. MarketData candles) stays float32 in
+# memory, with float64 accumulators inside the kernels.
+KERNEL_DTYPES = (np.float32, np.float64)
+
+# Kernel signatures, compiled at import; x is the price input, out an output array
+_EMA_SIGNATURES = array_signatures(lambda x, out: out(x, types.float64), KERNEL_DTYPES)
+_MACD_SIGNATURES = array_signatures(
+    lambda x, out: types.void(x, types.float64, types.float64, types.float64, out, out, out),
+    KERNEL_DTYPES)
+_RSI_SIGNATURES = array_signatures(lambda x, out: out(x, types.int64), KERNEL_DTYPES)
+_CROSSOVER_SIGNATURES = array_signatures(
+    lambda x, _: types.void(x, x, x, x, types.int8[:], types.int8[:]), (np.float64,))
+_ROLLING_SIGNATURES = array_signatures(
+    lambda x, out: types.void(x, types.int64, out, out), KERNEL_DTYPES)
+_BOLLINGER_SIGNATURES = array_signatures(
+    lambda x, out: types.void(x, types.int64, types.float64, out, out, out), KERNEL_DTYPES)
+
+
+@njit('UniTuple(float64, 2)(float64, float64, float64, float64, float64)', cache=True, nogil=True)
+def _ema_step(ema, old_weight, value, alpha, decay):
+    """
+    One pandas ewm(adjust=False) update
+    
+    NaNs are treated the way pandas treats them: the EMA is held across
+    the gap and the next value is weighted for the bars it spans.
+    
+    Returns:
+        tuple: (ema, old_weight) after value
+    """
+    if ema == ema:
+        old_weight *= decay
+        if value == value:
+            if ema != value:
+                ema = old_weight * ema + alpha * value
+                # Between gaps the weights sum to exactly 1.0 for most
+                # alphas, so the divide pandas does is a no-op; skip it
+                total_weight = old_weight + alpha
+                if total_weight != 1.0:
+                    ema /= total_weight
+            old_weight = 1.0
+    elif value == value:
+        ema = value
+    return ema, old_weight
+
+
+@njit(_EMA_SIGNATURES, cache=True, nogil=True)
+def _ema_kernel(x, alpha):
+    """
+    EMA of x, matching pandas ewm(alpha=alpha, adjust=False).mean()
+    
+    Args:
+        x: float32/float64 array, oldest first
+        alpha: Smoothing factor, 2 / (span + 1)
+        
+    Returns:
+        Array of EMA values, in x's dtype
+    """
+    n = x.shape[0]
+    y = np.empty_like(x)
+    if n == 0:
+        return y
+    
+    decay = 1.0 - alpha
+    ema = float(x[0])
+    old_weight = 1.0
+    y[0] = ema
+    
+    for i in range(1, n):
+        ema, old_weight = _ema_step(ema, old_weight, float(x[i]), alpha, decay)
+        y[i] = ema
+    
+    return y
+
+
+@njit(_MACD_SIGNATURES, cache=True, nogil=True)
+def _macd_kernel(x, fast_alpha, slow_alpha, signal_alpha, macd_line, signal_line, histogram):
+    """
+    MACD line, signal line and histogram of x in one pass
+    
+    Fuses the fast, slow and signal EMAs, each updated like _ema_kernel(),
+    so x is read once and the three EMA states stay in registers.
+    
+    Args:
+        x: float32/float64 array, oldest first
+        fast_alpha, slow_alpha, signal_alpha: EMA smoothing factors
+        macd_line, signal_line, histogram: Output arrays, same length as x
+    """
+    n = x.shape[0]
+    if n == 0:
+        return
+    
+    fast_decay = 1.0 - fast_alpha
+    slow_decay = 1.0 - slow_alpha
+    signal_decay = 1.0 - signal_alpha
+    
+    fast = float(x[0])
+    slow = fast
+    macd = fast - slow
+    signal = macd
+    fast_weight = slow_weight = signal_weight = 1.0
+    macd_line[0] = macd
+    signal_line[0] = signal
+    histogram[0] = macd - signal
+    
+    for i in range(1, n):
+        value = float(x[i])
+        fast, fast_weight = _ema_step(fast, fast_weight, value, fast_alpha, fast_decay)
+        slow, slow_weight = _ema_step(slow, slow_weight, value, slow_alpha, slow_decay)
+        macd = fast - slow
+        signal, signal_weight = _ema_step(signal, signal_weight, macd, signal_alpha, signal_decay)
+        
+        macd_line[i] = macd
+        signal_line[i] = signal
+        histogram[i] = macd - signal
+
+
+@njit(_RSI_SIGNATURES, cache=True, nogil=True)
+def _rsi_kernel(x, period):
+    """
+    Wilder's RSI of x in one pass
+    
+    The first average gain/loss is the mean of the first `period` moves,
+    then each move updates them as avg = (avg * (period - 1) + move) / period.
+    A NaN close is a gap: the averages are reseeded from the `period` moves
+    after it, with NaN output until then.
+    
+    Args:
+        x: float32/float64 array, oldest first
+        period: RSI period
+        
+    Returns:
+        Array of RSI values in x's dtype, NaN for the first `period` bars
+        and for the `period` bars after each gap
+    """
+    n = x.shape[0]
+    rsi = np.empty_like(x)
+    rsi[:] = np.nan
+    if n <= period:
+        return rsi
+    
+    inv_period = 1.0 / period
+    keep = (period - 1) * inv_period
+    
+    avg_gain = 0.0
+    avg_loss = 0.0
+    moves = 0
+    for i in range(1, n):
+        move = float(x[i]) - float(x[i - 1])
+        if move != move:
+            # Gap - start seeding again from the next move
+            avg_gain = 0.0
+            avg_loss = 0.0
+            moves = 0
+            continue
+        
+        gain = move if move > 0 else 0.0
+        loss = -move if move < 0 else 0.0
+        
+        moves += 1
+        if moves <= period:
+            avg_gain += gain * inv_period
+            avg_loss += loss * inv_period
+            if moves < period:
+                continue
+        else:
+            avg_gain = avg_gain * keep + gain * inv_period
+            avg_loss = avg_loss * keep + loss * inv_period
+        
+        if avg_loss > 0:
+            rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            rsi[i] = 100.0
+    
+    return rsi
+
+
+@njit(_CROSSOVER_SIGNATURES, cache=True, nogil=True)
+def _crossover_kernel(fast_prev, slow_prev, fast_current, slow_current, signals, crosses):
+    """
+    Branchless crossover_signal() over many (fast, slow) pairs
+    
+    The current signal is the sign of fast - slow at the current bar; a
+    cross is a move into it from the other side (or from equal). Both are
+    straight-line integer math on the comparison results.
+    
+    Args:
+        fast_prev, slow_prev: float64 arrays of previous values
+        fast_current, slow_current: float64 arrays of current values
+        signals: int8 output, 1 (bullish), -1 (bearish), 0 (neutral)
+        crosses: int8 output, 1 (bullish cross), -1 (bearish cross), 0 (none)
+    """
+    for j in range(signals.shape[0]):
+        above = int(fast_current[j] > slow_current[j])
+        below = int(fast_current[j] < slow_current[j])
+        signals[j] = above - below
+        # Written as comparisons, not signs, so a NaN previous value never counts as a cross
+        crosses[j] = int(fast_prev[j] <= slow_prev[j]) * above - int(fast_prev[j] >= slow_prev[j]) * below
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def _ema_columns(values, alpha, out):
+    """
+    _ema_kernel() down every column of a (bars, symbols) array, columns in parallel
+    """
+    for j in prange(values.shape[1]):
+        out[:, j] = _ema_kernel(values[:, j], alpha)
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def _macd_columns(values, fast_alpha, slow_alpha, signal_alpha, macd_line, signal_line, histogram):
+    """
+    _macd_kernel() down every column of a (bars, symbols) array, columns in parallel
+    """
+    for j in prange(values.shape[1]):
+        _macd_kernel(values[:, j], fast_alpha, slow_alpha, signal_alpha,
+                     macd_line[:, j], signal_line[:, j], histogram[:, j])
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def _rsi_columns(values, period, out):
+    """
+    _rsi_kernel() down every column of a (bars, symbols) array, columns in parallel
+    """
+    for j in prange(values.shape[1]):
+        out[:, j] = _rsi_kernel(values[:, j], period)
+
+
+@njit(_ROLLING_SIGNATURES, cache=True, nogil=True)
+def _rolling_mean_std_kernel(x, period, mean, std):
+    """
+    Rolling mean and sample standard deviation from running sums
+    
+    Each bar adds the incoming value to the running sum/sum of squares and
+    subtracts the one leaving the window. The sums are of each value minus
+    a shift (a recent value), so the sum of squares stays small and the
+    variance doesn't lose precision to cancellation on large prices. They
+    are rebuilt from the window once every `period` bars, re-picking the
+    shift, so rounding error can't accumulate.
+    Windows containing a NaN give NaN, like pandas rolling().
+    
+    Args:
+        x: float32/float64 array, oldest first
+        period: Window length
+        mean: Output array for the rolling mean
+        std: Output array for the rolling standard deviation (ddof=1)
+    """
+    n = x.shape[0]
+    total = 0.0
+    total_sq = 0.0
+    nans = 0
+    
+    shift = 0.0
+    for k in range(n):
+        if x[k] == x[k]:
+            shift = float(x[k])
+            break
+    
+    for i in range(n):
+        value = float(x[i])
+        if value == value:
+            d = value - shift
+            total += d
+            total_sq += d * d
+        else:
+            nans += 1
+        
+        if i >= period:
+            old = float(x[i - period])
+            if old == old:
+                d = old - shift
+                total -= d
+                total_sq -= d * d
+            else:
+                nans -= 1
+        
+        if i % period == 0 and i >= period:
+            if value == value:
+                shift = value
+            total = 0.0
+            total_sq = 0.0
+            for k in range(i - period + 1, i + 1):
+                v = float(x[k])
+                if v == v:
+                    d = v - shift
+                    total += d
+                    total_sq += d * d
+        
+        if i < period - 1 or nans > 0:
+            mean[i] = np.nan
+            std[i] = np.nan
+            continue
+        
+        mean[i] = shift + total / period
+        if period > 1:
+            variance = (total_sq - total * total / period) / (period - 1)
+            std[i] = np.sqrt(variance) if variance > 0 else 0.0
+        else:
+            std[i] = np.nan
+
+
+@njit(_BOLLINGER_SIGNATURES, cache=True, nogil=True)
+def _bollinger_kernel(x, period, std_dev, upper, middle, lower):
+    """
+    Bollinger Bands of x, written straight into the output arrays
+    
+    The rolling sums run once through _rolling_mean_std_kernel(), with
+    `lower` standing in for the standard deviation until the bands are
+    filled in, so no temporary arrays are allocated.
+    
+    Args:
+        x: float32/float64 array, oldest first
+        period: Window length
+        std_dev: Number of standard deviations
+        upper, middle, lower: Output arrays, same length as x
+    """
+    _rolling_mean_std_kernel(x, period, middle, lower)
+    
+    for i in range(x.shape[0]):
+        width = lower[i] * std_dev
+        upper[i] = middle[i] + width
+        lower[i] = middle[i] - width
+
+
+def _alpha(span):
+    """
+    EMA smoothing factor for a span, as pandas ewm(span=...) defines it
+    """
+    return 2.0 / (span + 1)
+
+
+def _extract_close(data):
+    """
+    Close prices from a DataFrame ('close', then 'Close', else the last column);
+    a Series or array is returned as is
+    """
+    if not isinstance(data, pd.DataFrame):
+        return data
+    
+    columns = data.columns
+    if 'close' in columns:
+        return data['close']
+    if 'Close' in columns:
+        return data['Close']
+    return data.iloc[:, -1]
+
+
+def _kernel_dtype(values):
+    """
+    dtype to run the kernels in for these values (an array or Series)
+    """
+    return values.dtype if values.dtype in KERNEL_DTYPES else np.float64
+
+
+def _as_float_array(prices):
+    """
+    Contiguous float32/float64 view (or copy) of a price Series/array for the kernels
+    """
+    if isinstance(prices, pd.Series):
+        # Straight from the Series' buffer, no copy for float32/float64; nullable
+        # (Float64/Int64) NA becomes NaN rather than an object array
+        values = prices.to_numpy(dtype=_kernel_dtype(prices), copy=False, na_value=np.nan)
+    else:
+        values = np.asarray(prices)
+    return np.ascontiguousarray(values, dtype=_kernel_dtype(values))
+
+
+def _as_float_columns(prices):
+    """
+    Column-major float32/float64 copy of a (bars, symbols) array/DataFrame,
+    so each symbol's history is contiguous for the batch kernels
+    """
+    values = np.asarray(prices)
+    values = np.asfortranarray(values, dtype=_kernel_dtype(values))
+    if values.ndim != 2:
+        raise ValueError("Batch indicators need a 2-D (bars, symbols) array")
+    return values
+
+
+def _like(values, prices):
+    """
+    Wrap kernel output in a Series/DataFrame aligned with prices, if prices is one
+    """
+    if isinstance(prices, pd.Series):
+        return pd.Series(values, index=prices.index, name=prices.name)
+    if isinstance(prices, pd.DataFrame):
+        return pd.DataFrame(values, index=prices.index, columns=prices.columns)
+    return values
+
+
+def _rolling_mean_std(prices, period):
+    """
+    Rolling mean and standard deviation arrays for prices
+    """
+    values = _as_float_array(prices)
+    mean = np.empty_like(values)
+    std = np.empty_like(values)
+    _rolling_mean_std_kernel(values, period, mean, std)
+    
+    return mean, std
+
+
+def warm_up():
+    """
+    Compile (or load from the on-disk cache) the parallel batch kernels
+    
+    The single-series kernels are compiled at import from their signatures;
+    the batch kernels compile on first call, so call this at startup to
+    keep that out of the first request.
+    """
+    calculate_ema_batch(np.ones((3, 1)), 1)
+    calculate_macd_batch(np.ones((3, 1)), 1, 1, 1)
+    calculate_rsi_batch(np.ones((3, 1)), 1)
 
 
 def calculate_ema(data, period):
@@ -11,24 +429,15 @@ def calculate_ema(data, period):
     Calculate Exponential Moving Average
     
     Args:
-        data: pandas Series or DataFrame with price data
+        data: pandas Series or DataFrame with price data, or a NumPy array
         period: EMA period
         
     Returns:
-        pandas Series with EMA values
-    """
-    if isinstance(data, pd.DataFrame):
-        # If DataFrame, use 'close' column
-        if 'close' in data.columns:
-            prices = data['close']
-        elif 'Close' in data.columns:
-            prices = data['Close']
-        else:
-            prices = data.iloc[:, -1]  # Use last column
-    else:
-        prices = data
+        pandas Series with EMA values (NumPy array for array input)
+    """
+    prices = _extract_close(data)
     
-    return prices.ewm(span=period, adjust=False).mean()
+    return _like(_ema_kernel(_as_float_array(prices), _alpha(period)), prices)
 
 
 def calculate_sma(data, period):
@@ -36,23 +445,16 @@ def calculate_sma(data, period):
     Calculate Simple Moving Average
     
     Args:
-        data: pandas Series or DataFrame with price data
+        data: pandas Series or DataFrame with price data, or a NumPy array
         period: SMA period
         
     Returns:
-        pandas Series with SMA values
+        pandas Series with SMA values (NumPy array for array input)
     """
-    if isinstance(data, pd.DataFrame):
-        if 'close' in data.columns:
-            prices = data['close']
-        elif 'Close' in data.columns:
-            prices = data['Close']
-        else:
-            prices = data.iloc[:, -1]
-    else:
-        prices = data
+    prices = _extract_close(data)
     
-    return prices.rolling(window=period).mean()
+    middle_band, _ = _rolling_mean_std(prices, period)
+    return _like(middle_band, prices)
 
 
 def detect_crossover(fast_series, slow_series):
@@ -60,23 +462,62 @@ def detect_crossover(fast_series, slow_series):
     Detect crossover between two series (e.g., fast EMA and slow EMA)
     
     Args:
-        fast_series: pandas Series with fast indicator values
-        slow_series: pandas Series with slow indicator values
+        fast_series: pandas Series (or NumPy array) with fast indicator values
+        slow_series: pandas Series (or NumPy array) with slow indicator values
         
     Returns:
         tuple: (current_signal, crossover_type)
             current_signal: 1 (bullish), -1 (bearish), 0 (neutral)
             crossover_type: 'bullish_cross', 'bearish_cross', or None
     """
-    # Get the last two values
-    if len(fast_series) < 2 or len(slow_series) < 2:
+    # Read the last two values straight from the arrays, skipping .iloc
+    fast = getattr(fast_series, 'values', fast_series)
+    slow = getattr(slow_series, 'values', slow_series)
+    
+    if len(fast) < 2 or len(slow) < 2:
         return 0, None
     
-    fast_current = fast_series.iloc[-1]
-    fast_prev = fast_series.iloc[-2]
-    slow_current = slow_series.iloc[-1]
-    slow_prev = slow_series.iloc[-2]
+    return crossover_signal(fast[-2], slow[-2], fast[-1], slow[-1])
+
+
+def detect_crossovers(fast, slow):
+    """
+    Detect crossovers for many symbols at once
+    
+    Args:
+        fast: 2-D array or DataFrame of fast indicator values, one column per symbol
+        slow: Slow indicator values, same shape as fast
+        
+    Returns:
+        tuple: (signals, crosses), int8 arrays with one entry per symbol
+            signals: 1 (bullish), -1 (bearish), 0 (neutral)
+            crosses: 1 (bullish cross), -1 (bearish cross), 0 (none)
+    """
+    fast = np.asarray(fast, dtype=np.float64)
+    slow = np.asarray(slow, dtype=np.float64)
+    
+    signals = np.zeros(fast.shape[1], dtype=np.int8)
+    crosses = np.zeros(fast.shape[1], dtype=np.int8)
+    
+    if fast.shape[0] >= 2 and slow.shape[0] >= 2:
+        _crossover_kernel(fast[-2], slow[-2], fast[-1], slow[-1], signals, crosses)
+    
+    return signals, crosses
+
+
+def crossover_signal(fast_prev, slow_prev, fast_current, slow_current):
+    """
+    Classify the move between two (fast, slow) indicator readings
     
+    Args:
+        fast_prev: Previous fast indicator value
+        slow_prev: Previous slow indicator value
+        fast_current: Current fast indicator value
+        slow_current: Current slow indicator value
+        
+    Returns:
+        tuple: (current_signal, crossover_type), as for detect_crossover()
+    """
     # Detect bullish crossover (fast crosses above slow)
     if fast_prev <= slow_prev and fast_current > slow_current:
         return 1, 'bullish_cross'
@@ -96,41 +537,18 @@ def detect_crossover(fast_series, slow_series):
 
 def calculate_rsi(data, period=14):
     """
-    Calculate Relative Strength Index (RSI)
+    Calculate Relative Strength Index (RSI) with Wilder's smoothing
     
     Args:
-        data: pandas Series or DataFrame with price data
+        data: pandas Series or DataFrame with price data, or a NumPy array
         period: RSI period (default: 14)
         
     Returns:
-        pandas Series with RSI values
+        pandas Series with RSI values (NumPy array for array input)
     """
-    if isinstance(data, pd.DataFrame):
-        if 'close' in data.columns:
-            prices = data['close']
-        elif 'Close' in data.columns:
-            prices = data['Close']
-        else:
-            prices = data.iloc[:, -1]
-    else:
-        prices = data
-    
-    # Calculate price changes
-    delta = prices.diff()
+    prices = _extract_close(data)
     
-    # Separate gains and losses
-    gains = delta.where(delta > 0, 0)
-    losses = -delta.where(delta < 0, 0)
-    
-    # Calculate average gains and losses
-    avg_gains = gains.rolling(window=period).mean()
-    avg_losses = losses.rolling(window=period).mean()
-    
-    # Calculate RS and RSI
-    rs = avg_gains / avg_losses
-    rsi = 100 - (100 / (1 + rs))
-    
-    return rsi
+    return _like(_rsi_kernel(_as_float_array(prices), period), prices)
 
 
 def calculate_macd(data, fast_period=12, slow_period=26, signal_period=9):
@@ -138,7 +556,7 @@ def calculate_macd(data, fast_period=12, slow_period=26, signal_period=9):
     Calculate MACD (Moving Average Convergence Divergence)
     
     Args:
-        data: pandas Series or DataFrame with price data
+        data: pandas Series or DataFrame with price data, or a NumPy array
         fast_period: Fast EMA period (default: 12)
         slow_period: Slow EMA period (default: 26)
         signal_period: Signal line period (default: 9)
@@ -146,28 +564,80 @@ def calculate_macd(data, fast_period=12, slow_period=26, signal_period=9):
     Returns:
         tuple: (macd_line, signal_line, histogram)
     """
-    if isinstance(data, pd.DataFrame):
-        if 'close' in data.columns:
-            prices = data['close']
-        elif 'Close' in data.columns:
-            prices = data['Close']
-        else:
-            prices = data.iloc[:, -1]
-    else:
-        prices = data
+    prices = _extract_close(data)
     
-    # Calculate MACD line
-    fast_ema = prices.ewm(span=fast_period, adjust=False).mean()
-    slow_ema = prices.ewm(span=slow_period, adjust=False).mean()
-    macd_line = fast_ema - slow_ema
+    values = _as_float_array(prices)
+    macd_line = np.empty_like(values)
+    signal_line = np.empty_like(values)
+    histogram = np.empty_like(values)
     
-    # Calculate signal line
-    signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
+    # MACD line, signal line and histogram in one pass
+    _macd_kernel(values, _alpha(fast_period), _alpha(slow_period), _alpha(signal_period),
+                 macd_line, signal_line, histogram)
     
-    # Calculate histogram
-    histogram = macd_line - signal_line
+    return _like(macd_line, prices), _like(signal_line, prices), _like(histogram, prices)
+
+
+def calculate_ema_batch(prices, period):
+    """
+    Calculate EMA for many symbols at once
     
-    return macd_line, signal_line, histogram
+    Args:
+        prices: 2-D array or DataFrame of closes, one column per symbol
+        period: EMA period
+        
+    Returns:
+        EMA values in the same shape (DataFrame for DataFrame input)
+    """
+    values = _as_float_columns(prices)
+    out = np.empty_like(values)
+    set_parallel_threads(config.INDICATOR_THREADS)
+    _ema_columns(values, _alpha(period), out)
+    
+    return _like(out, prices)
+
+
+def calculate_rsi_batch(prices, period=14):
+    """
+    Calculate Wilder's RSI for many symbols at once
+    
+    Args:
+        prices: 2-D array or DataFrame of closes, one column per symbol
+        period: RSI period (default: 14)
+        
+    Returns:
+        RSI values in the same shape (DataFrame for DataFrame input)
+    """
+    values = _as_float_columns(prices)
+    out = np.empty_like(values)
+    set_parallel_threads(config.INDICATOR_THREADS)
+    _rsi_columns(values, period, out)
+    
+    return _like(out, prices)
+
+
+def calculate_macd_batch(prices, fast_period=12, slow_period=26, signal_period=9):
+    """
+    Calculate MACD for many symbols at once
+    
+    Args:
+        prices: 2-D array or DataFrame of closes, one column per symbol
+        fast_period: Fast EMA period (default: 12)
+        slow_period: Slow EMA period (default: 26)
+        signal_period: Signal line period (default: 9)
+        
+    Returns:
+        tuple: (macd_line, signal_line, histogram), each in the same shape
+    """
+    values = _as_float_columns(prices)
+    macd_line = np.empty_like(values)
+    signal_line = np.empty_like(values)
+    histogram = np.empty_like(values)
+    set_parallel_threads(config.INDICATOR_THREADS)
+    _macd_columns(values, _alpha(fast_period), _alpha(slow_period), _alpha(signal_period),
+                  macd_line, signal_line, histogram)
+    
+    return _like(macd_line, prices), _like(signal_line, prices), _like(histogram, prices)
 
 
 def calculate_bollinger_bands(data, period=20, std_dev=2):
@@ -175,31 +645,156 @@ def calculate_bollinger_bands(data, period=20, std_dev=2):
     Calculate Bollinger Bands
     
     Args:
-        data: pandas Series or DataFrame with price data
+        data: pandas Series or DataFrame with price data, or a NumPy array
         period: Moving average period (default: 20)
         std_dev: Number of standard deviations (default: 2)
         
     Returns:
         tuple: (upper_band, middle_band, lower_band)
     """
-    if isinstance(data, pd.DataFrame):
-        if 'close' in data.columns:
-            prices = data['close']
-        elif 'Close' in data.columns:
-            prices = data['Close']
-        else:
-            prices = data.iloc[:, -1]
-    else:
-        prices = data
+    prices = _extract_close(data)
+    values = _as_float_array(prices)
+    upper_band = np.empty_like(values)
+    middle_band = np.empty_like(values)
+    lower_band = np.empty_like(values)
     
-    # Calculate middle band (SMA)
-    middle_band = prices.rolling(window=period).mean()
+    # Middle band (SMA), standard deviation and both bands in one kernel call
+    _bollinger_kernel(values, period, float(std_dev), upper_band, middle_band, lower_band)
     
-    # Calculate standard deviation
-    std = prices.rolling(window=period).std()
+    return _like(upper_band, prices), _like(middle_band, prices), _like(lower_band, prices)
+
+
+class IncrementalSMA:
+    """
+    Simple moving average updated one bar at a time
     
-    # Calculate upper and lower bands
-    upper_band = middle_band + (std * std_dev)
-    lower_band = middle_band - (std * std_dev)
+    Keeps the last `period` values and their running sum, so each update
+    is O(1) instead of re-averaging the whole window. The sum is rebuilt
+    from the window every `period` updates to keep rounding error bounded.
+    """
+    
+    def __init__(self, period):
+        """
+        Initialize incremental SMA
+        
+        Args:
+            period: SMA period
+        """
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.count = 0
+    
+    def _push(self, value):
+        """
+        Slide the window forward by one value
+        
+        Returns:
+            bool: True once the window is full
+        """
+        window = self.window
+        full = len(window) == self.period
+        if full:
+            self._remove(window[0])
+        window.append(value)
+        self._add(value)
+        
+        self.count += 1
+        if self.count % self.period == 0:
+            self._rebuild()
+        
+        return full or len(window) == self.period
     
-    return upper_band, middle_band, lower_band
+    def _add(self, value):
+        self.total += value
+    
+    def _remove(self, value):
+        self.total -= value
+    
+    def _rebuild(self):
+        self.total = math.fsum(self.window)
+    
+    def update(self, value):
+        """
+        Add the latest close
+        
+        Args:
+            value: Latest close
+            
+        Returns:
+            float: SMA over the last `period` closes, or None until the window is full
+        """
+        if not self._push(float(value)):
+            return None
+        
+        return self.total / self.period
+
+
+class IncrementalBB(IncrementalSMA):
+    """
+    Bollinger Bands updated one bar at a time
+    
+    Adds running sums of (value - shift) and its square to IncrementalSMA,
+    like the calculate_bollinger_bands() kernel, so the variance keeps its
+    precision on large prices. The standard deviation uses ddof=1, like
+    calculate_bollinger_bands().
+    """
+    
+    def __init__(self, period=20, std_dev=2):
+        """
+        Initialize incremental Bollinger Bands
+        
+        Args:
+            period: Moving average period (default: 20)
+            std_dev: Number of standard deviations (default: 2)
+        """
+        super().__init__(period)
+        self.std_dev = std_dev
+        self.shift = None
+        self.shifted_total = 0.0
+        self.shifted_sq = 0.0
+    
+    def _add(self, value):
+        if self.shift is None:
+            self.shift = value
+        self.total += value
+        d = value - self.shift
+        self.shifted_total += d
+        self.shifted_sq += d * d
+    
+    def _remove(self, value):
+        self.total -= value
+        d = value - self.shift
+        self.shifted_total -= d
+        self.shifted_sq -= d * d
+    
+    def _rebuild(self):
+        window = self.window
+        self.total = math.fsum(window)
+        self.shift = shift = window[-1]
+        self.shifted_total = math.fsum(v - shift for v in window)
+        self.shifted_sq = math.fsum((v - shift) * (v - shift) for v in window)
+    
+    def update(self, value):
+        """
+        Add the latest close
+        
+        Args:
+            value: Latest close
+            
+        Returns:
+            tuple: (upper_band, middle_band, lower_band), or None until the window is full
+        """
+        if not self._push(float(value)):
+            return None
+        
+        period = self.period
+        middle_band = self.total / period
+        if period > 1:
+            shifted_total = self.shifted_total
+            variance = (self.shifted_sq - shifted_total * shifted_total / period) / (period - 1)
+            std = math.sqrt(variance) if variance > 0 else 0.0
+        else:
+            std = math.nan
+        
+        return middle_band + std * self.std_dev, middle_band, middle_band - std * self.std_dev
@@ -0,0 +1,66 @@
+"""
+JIT helpers
+Numba decorators that degrade to plain Python when Numba is not installed
+"""
+import numpy as np
+
+try:
+    from numba import config as numba_config, from_dtype, njit, prange, set_num_threads, types
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    types = None
+
+    def njit(*args, **kwargs):
+        """
+        Stand-in for numba.njit that returns the function unchanged
+
+        Supports both @njit and @njit(signature, cache=True, ...) forms.
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+
+def array_signatures(build, dtypes):
+    """
+    Eager njit signatures for a kernel over 1-D arrays, one per dtype
+
+    Passing these to njit compiles the kernel when its module is imported
+    (or loads it from the on-disk cache) instead of on the first call.
+    Arrays are typed with 'A' layout so strided column slices match too,
+    and inputs as read-only so NumPy views of pandas data are accepted.
+
+    Args:
+        build: Callable (data, out) -> signature, given the read-only input
+               and writable output array types for one dtype
+        dtypes: NumPy dtypes to compile for
+
+    Returns:
+        list: Signatures (empty when Numba is not installed)
+    """
+    if not NUMBA_AVAILABLE:
+        return []
+
+    signatures = []
+    for dtype in dtypes:
+        scalar = from_dtype(np.dtype(dtype))
+        signatures.append(build(types.Array(scalar, 1, 'A', readonly=True),
+                                types.Array(scalar, 1, 'A')))
+    return signatures
+
+
+def set_parallel_threads(count):
+    """
+    Set how many threads parallel=True kernels called from this thread use
+
+    Numba's thread count is per calling thread, so this is applied before
+    each batch call rather than once at import.
+
+    Args:
+        count: Thread count, capped at the cores Numba started with (0 = all)
+    """
+    if NUMBA_AVAILABLE:
+        cores = numba_config.NUMBA_NUM_THREADS
+        set_num_threads(min(count, cores) if count > 0 else cores)
@@ -2,14 +2,40 @@
 Webhook Server for TradingView Integration
 Flask-based server to receive and process TradingView alerts
 """
+import hmac
 import logging
-from flask import Flask, request, jsonify
-from threading import Thread
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from flask import Flask, Response, request
+from threading import Lock, Thread
 import config
+from api import fast_json
+
+try:
+    from waitress import serve
+except ImportError:
+    serve = None
 
 logger = logging.getLogger(__name__)
 
 
+def _json_response(obj, status=200):
+    """
+    Build a JSON response encoded with orjson
+    
+    Args:
+        obj: JSON-serializable object (datetimes and NumPy scalars included)
+        status: HTTP status code
+        
+    Returns:
+        Response: Flask response with an application/json body
+    """
+    return Response(fast_json.dumps(obj), status=status, mimetype='application/json')
+
+
 class WebhookServer:
     """
     Webhook server for receiving TradingView alerts
@@ -27,14 +53,34 @@ class WebhookServer:
         self.token = token or config.WEBHOOK_TOKEN
         
         self.app = Flask(__name__)
+        
+        # Routes encode with orjson (compact, UTF-8); keep anything that still
+        # goes through Flask's own JSON provider (jsonify) just as lean
+        self.app.json.compact = True
+        self.app.json.ensure_ascii = False
+        self.app.json.sort_keys = False
+        
         self.server_thread = None
         self.is_running = False
         
         # Callback function to execute trades
         self.trade_callback = None
         
-        # Webhook logs
-        self.webhook_logs = []
+        # Callbacks run off the request thread so alerts are acknowledged at
+        # once; a single worker (the default) executes them in arrival order
+        self._executor = ThreadPoolExecutor(max_workers=config.WEBHOOK_CALLBACK_WORKERS,
+                                            thread_name_prefix='webhook-trade')
+        
+        # Alert id -> callback Future for /result/<id>, oldest dropped first
+        self._results = {}
+        self._results_lock = Lock()
+        
+        # Webhook logs, oldest dropped first; log_version changes whenever they do
+        self.webhook_logs = deque(maxlen=config.MAX_WEBHOOK_LOGS)
+        self.log_version = 0
+        
+        # ((log_version, limit), encoded /logs body) of the last /logs response
+        self._logs_cache = None
         
         # Setup routes
         self._setup_routes()
@@ -45,95 +91,154 @@ class WebhookServer:
         """
         Setup Flask routes
         """
-        @self.app.route('/health', methods=['GET'])
-        def health():
-            """Health check endpoint"""
-            return jsonify({
-                'status': 'ok',
-                'server': 'Fyers Auto Trading Webhook',
-                'version': '1.0'
-            })
-        
-        @self.app.route('/webhook', methods=['POST'])
-        def webhook():
-            """Main webhook endpoint for TradingView alerts"""
+        self.app.add_url_rule('/health', 'health', self._health, methods=['GET'])
+        self.app.add_url_rule('/webhook', 'webhook', self._webhook, methods=['POST'])
+        self.app.add_url_rule('/logs', 'logs', self._logs, methods=['GET'])
+        self.app.add_url_rule('/result/<alert_id>', 'result', self._result, methods=['GET'])
+    
+    def _health(self):
+        """Health check endpoint"""
+        return _json_response({
+            'status': 'ok',
+            'server': 'Fyers Auto Trading Webhook',
+            'version': '1.0'
+        })
+    
+    def _webhook(self):
+        """Main webhook endpoint for TradingView alerts"""
+        try:
+            # Parse the raw body with orjson, whatever the Content-Type
+            body = request.get_data(cache=False)
+            
             try:
-                # Get JSON payload
-                data = request.get_json()
-                
-                if not data:
-                    logger.warning("No data received in webhook")
-                    return jsonify({'status': 'error', 'message': 'No data received'}), 400
-                
-                # Validate token
-                request_token = data.get('token')
-                if not request_token or request_token != self.token:
-                    logger.warning(f"Invalid token received: {request_token}")
-                    return jsonify({'status': 'error', 'message': 'Invalid token'}), 401
-                
-                # Extract trade parameters
-                action = data.get('action', '').upper()
-                symbol = data.get('symbol', '')
-                quantity = data.get('quantity', 0)
-                order_type = data.get('order_type', 'MARKET').upper()
-                price = data.get('price', 0)
-                
-                # Validate required fields
-                if not action or not symbol:
-                    logger.warning("Missing required fields in webhook")
-                    return jsonify({'status': 'error', 'message': 'Missing required fields'}), 400
-                
-                if action not in ['BUY', 'SELL', 'EXIT']:
-                    logger.warning(f"Invalid action: {action}")
-                    return jsonify({'status': 'error', 'message': 'Invalid action'}), 400
-                
-                # Log webhook
-                webhook_log = {
-                    'action': action,
-                    'symbol': symbol,
-                    'quantity': quantity,
-                    'order_type': order_type,
-                    'price': price,
-                    'data': data
-                }
-                self._add_log(webhook_log)
-                
-                logger.info(f"Webhook received: {action} {symbol} x {quantity}")
-                
-                # Execute trade callback if set
-                if self.trade_callback:
-                    try:
-                        result = self.trade_callback(webhook_log)
-                        return jsonify({
-                            'status': 'success',
-                            'message': 'Trade executed',
-                            'result': result
-                        })
-                    except Exception as e:
-                        logger.error(f"Error executing trade callback: {e}")
-                        return jsonify({
-                            'status': 'error',
-                            'message': f'Trade execution failed: {str(e)}'
-                        }), 500
-                else:
-                    logger.warning("No trade callback set")
-                    return jsonify({
-                        'status': 'success',
-                        'message': 'Webhook received but no callback set'
-                    })
-                
-            except Exception as e:
-                logger.error(f"Error processing webhook: {e}")
-                return jsonify({'status': 'error', 'message': str(e)}), 500
-        
-        @self.app.route('/logs', methods=['GET'])
-        def logs():
-            """Get webhook logs"""
-            limit = request.args.get('limit', 50, type=int)
-            return jsonify({
+                data = fast_json.loads(body) if body else None
+            except ValueError:
+                logger.warning("Invalid JSON received in webhook")
+                return _json_response({'status': 'error', 'message': 'Invalid JSON'}, 400)
+            
+            if not data:
+                logger.warning("No data received in webhook")
+                return _json_response({'status': 'error', 'message': 'No data received'}, 400)
+            
+            # Validate token
+            request_token = data.get('token')
+            # Constant-time compare; bytes so non-ASCII tokens can't raise
+            if not request_token or not hmac.compare_digest(str(request_token).encode(), self.token.encode()):
+                logger.warning(f"Invalid token received: {request_token}")
+                return _json_response({'status': 'error', 'message': 'Invalid token'}, 401)
+            
+            # Extract trade parameters
+            action = data.get('action', '').upper()
+            symbol = data.get('symbol', '')
+            quantity = data.get('quantity', 0)
+            order_type = data.get('order_type', 'MARKET').upper()
+            price = data.get('price', 0)
+            
+            # Validate required fields
+            if not action or not symbol:
+                logger.warning("Missing required fields in webhook")
+                return _json_response({'status': 'error', 'message': 'Missing required fields'}, 400)
+            
+            if action not in ['BUY', 'SELL', 'EXIT']:
+                logger.warning(f"Invalid action: {action}")
+                return _json_response({'status': 'error', 'message': 'Invalid action'}, 400)
+            
+            # Log webhook
+            webhook_log = {
+                'id': uuid.uuid4().hex,
+                'action': action,
+                'symbol': symbol,
+                'quantity': quantity,
+                'order_type': order_type,
+                'price': price,
+                'data': data
+            }
+            self._add_log(webhook_log)
+            
+            logger.info(f"Webhook received: {action} {symbol} x {quantity}")
+            
+            # Queue trade callback if set, the outcome is at /result/<id>
+            if self.trade_callback:
+                alert_id = webhook_log['id']
+                self._submit_trade(webhook_log)
+                return _json_response({
+                    'status': 'accepted',
+                    'message': 'Trade queued',
+                    'id': alert_id,
+                    'result_url': f'/result/{alert_id}'
+                }, 202)
+            else:
+                logger.warning("No trade callback set")
+                return _json_response({
+                    'status': 'success',
+                    'message': 'Webhook received but no callback set'
+                })
+            
+        except Exception as e:
+            logger.error(f"Error processing webhook: {e}")
+            return _json_response({'status': 'error', 'message': str(e)}, 500)
+    
+    def _logs(self):
+        """Get webhook logs"""
+        limit = request.args.get('limit', 50, type=int)
+        
+        # Repeated polls between alerts reuse the encoded body
+        key = (self.log_version, limit)
+        cached = self._logs_cache
+        if cached is None or cached[0] != key:
+            cached = (key, fast_json.dumps({
                 'status': 'ok',
-                'logs': self.webhook_logs[-limit:]
-            })
+                'logs': self.get_logs(limit)
+            }))
+            self._logs_cache = cached
+        
+        return Response(cached[1], mimetype='application/json')
+    
+    def _result(self, alert_id):
+        """Get the outcome of a queued trade callback"""
+        future = self._results.get(alert_id)
+        
+        if future is None:
+            return _json_response({'status': 'error', 'message': 'Unknown alert id'}, 404)
+        
+        if not future.done():
+            return _json_response({'status': 'pending', 'id': alert_id}, 202)
+        
+        error = future.exception()
+        if error is not None:
+            return _json_response({
+                'status': 'error',
+                'message': f'Trade execution failed: {str(error)}'
+            }, 500)
+        
+        return _json_response({
+            'status': 'success',
+            'message': 'Trade executed',
+            'result': future.result()
+        })
+    
+    def _submit_trade(self, webhook_log):
+        """
+        Run the trade callback for an alert on the worker pool
+        
+        Args:
+            webhook_log: Logged alert, passed to the callback
+        """
+        future = self._executor.submit(self.trade_callback, webhook_log)
+        future.add_done_callback(self._trade_done)
+        
+        with self._results_lock:
+            self._results[webhook_log['id']] = future
+            while len(self._results) > config.MAX_WEBHOOK_LOGS:
+                del self._results[next(iter(self._results))]
+    
+    def _trade_done(self, future):
+        """
+        Log a failed trade callback (nobody may poll its result)
+        """
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Error executing trade callback: {error}")
     
     def _add_log(self, log_entry):
         """
@@ -142,13 +247,9 @@ class WebhookServer:
         Args:
             log_entry: Dictionary with log data
         """
-        from datetime import datetime
-        log_entry['timestamp'] = datetime.now().isoformat()
+        log_entry['timestamp'] = datetime.now()
         self.webhook_logs.append(log_entry)
-        
-        # Keep only last 1000 logs
-        if len(self.webhook_logs) > 1000:
-            self.webhook_logs = self.webhook_logs[-1000:]
+        self.log_version += 1
     
     def set_trade_callback(self, callback):
         """
@@ -171,7 +272,12 @@ class WebhookServer:
         
         def run_server():
             logger.info(f"Starting webhook server on port {self.port}")
-            self.app.run(host='0.0.0.0', port=self.port, debug=False, use_reloader=False)
+            if serve is not None:
+                # Production WSGI server, handles alert bursts on a thread pool
+                serve(self.app, host='0.0.0.0', port=self.port, threads=config.WEBHOOK_THREADS)
+            else:
+                logger.warning("waitress not installed, using the Flask development server")
+                self.app.run(host='0.0.0.0', port=self.port, debug=False, use_reloader=False, threaded=True)
         
         self.server_thread = Thread(target=run_server, daemon=True)
         self.server_thread.start()
@@ -204,15 +310,31 @@ class WebhookServer:
             limit: Maximum number of logs to return
             
         Returns:
-            list: Recent webhook logs
+            list: Recent webhook logs, oldest first
+        """
+        if limit <= 0:
+            return list(self.webhook_logs)
+        
+        # Walk back from the newest entry so only `limit` entries are touched
+        logs = list(islice(reversed(self.webhook_logs), limit))
+        logs.reverse()
+        return logs
+    
+    def get_log_version(self):
+        """
+        Get the current log version
+        
+        Returns:
+            int: Counter bumped on every log change, for cheap change detection
         """
-        return self.webhook_logs[-limit:]
+        return self.log_version
     
     def clear_logs(self):
         """
         Clear all webhook logs
         """
-        self.webhook_logs = []
+        self.webhook_logs.clear()
+        self.log_version += 1
         logger.info("Webhook logs cleared")
     
     def test_webhook(self):